@@ -0,0 +1,447 @@
+"""오프라인 성능 측정 스크립트 (텔레그램 토큰 없이 실행).
+
+임시 디렉터리에 가상 데이터(예정 일정, 지난 일정, 사용자)를 만든 뒤 main.py를 불러와
+알림 루프 한 번, 지난 일정 정리, /list, /history365, /noti 전송의 소요 시간을 측정한다.
+application.bot 대신 지연·오류·전송 제한(RetryAfter) 응답을 흉내 내는 가짜 봇을 사용한다.
+
+    python bench.py                          # 기본 규모로 측정하고 bench_report.json에 저장
+    python bench.py --latency 0.05           # 전송 한 건에 50ms 지연
+    python bench.py --compare old.json       # 이전 보고서와 비교 (느려진 항목이 있으면 종료 코드 1)
+    python bench.py --api                    # 로컬 가짜 Bot API 서버로 HTTP 연결 설정별 전송 속도도 측정
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pytz import timezone
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_PATH = os.path.join(BASE_DIR, "main.py")
+ADMIN_CHAT_ID = 1
+KST = timezone("Asia/Seoul")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="KTU-GG-Alert 오프라인 성능 측정")
+    parser.add_argument("--events", type=int, default=10_000, help="예정 일정 수")
+    parser.add_argument("--history", type=int, default=100_000, help="지난 일정 수")
+    parser.add_argument("--subscribers", type=int, default=50_000, help="구독자 수")
+    parser.add_argument("--expire", type=int, default=100, help="update_schedule 한 번에 지나가는 일정 수")
+    parser.add_argument("--repeat", type=int, default=5, help="항목별 측정 횟수")
+    parser.add_argument("--latency", type=float, default=0.0, help="가짜 봇의 전송 한 건당 지연(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="차단(Forbidden) 응답 비율")
+    parser.add_argument("--retry-after-rate", type=float, default=0.0, help="전송 제한(RetryAfter) 응답 비율")
+    parser.add_argument("--rate", type=float, default=1_000_000, help="측정 중 전체 전송 속도 제한(초당 건수)")
+    parser.add_argument("--concurrency", type=int, default=200, help="측정 중 동시 전송 수")
+    parser.add_argument("--storage", choices=("json", "sqlite"), default="json", help="저장 방식")
+    parser.add_argument("--seed", type=int, default=42, help="가상 데이터·오류 난수 시드")
+    parser.add_argument("--output", default="bench_report.json", help="보고서 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 보고서 경로")
+    parser.add_argument("--threshold", type=float, default=0.10, help="느려졌다고 판단할 중앙값 증가 비율")
+    parser.add_argument("--keep", action="store_true", help="측정에 쓴 임시 디렉터리를 지우지 않음")
+    parser.add_argument("--api", action="store_true", help="로컬 가짜 Bot API 서버로 실제 HTTP 전송 경로 측정")
+    parser.add_argument("--api-messages", type=int, default=2000, help="--api 측정 한 번에 보내는 메시지 수")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="가짜 Bot API 서버의 sendMessage 응답 지연(초)")
+    return parser.parse_args()
+
+
+def make_dataset(workdir, args, rng):
+    """main.py가 읽는 JSON 파일 형식으로 가상 데이터 생성."""
+    now = datetime.now(KST).replace(second=0, microsecond=0)
+
+    # 예정 일정: 측정 중 알림 시각이 되지 않도록 (일주일 전 알림 포함) 10일 뒤부터 1년 사이에 분포
+    events = []
+    for i in range(args.events):
+        event_time = now + timedelta(days=10, minutes=rng.randrange(365 * 24 * 60))
+        events.append({"time": event_time.strftime("%y%m%d %H%M"), "description": f"일정 {i}"})
+
+    # 지난 일정: 최근 2년 사이에 분포
+    history = []
+    for i in range(args.history):
+        event_time = now - timedelta(minutes=rng.randrange(1, 2 * 365 * 24 * 60))
+        history.append({"time": event_time.strftime("%y%m%d %H%M"), "description": f"지난 일정 {i}"})
+    history.sort(key=lambda item: item["time"])
+
+    # 구독자: 개인 채팅(양수)과 단톡방(음수)이 섞인 chat_id
+    user_ids = [ADMIN_CHAT_ID]
+    for i in range(args.subscribers - 1):
+        chat_id = 100_000 + i
+        user_ids.append(-chat_id if i % 100 == 0 else chat_id)
+
+    files = {
+        "schedules.json": events,
+        "past_schedules.json": history,
+        "user_ids.json": user_ids,
+        "admins.json": [{"name": "bench", "chat_id": ADMIN_CHAT_ID}],
+    }
+    for name, data in files.items():
+        with open(os.path.join(workdir, name), "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False)
+
+    if args.storage == "sqlite":
+        subprocess.run([sys.executable, MAIN_PATH, "migrate"], cwd=workdir, env=os.environ, check=True)
+
+
+class FakeBot:
+    """application.bot 대신 쓰는 가짜 봇. 지연·차단·전송 제한 응답을 흉내 낸다."""
+
+    def __init__(self, latency, error_rate, retry_after_rate, rng):
+        self.token = "bench"
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after_rate = retry_after_rate
+        self.rng = rng
+        self.sent = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        from telegram.error import Forbidden, RetryAfter
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        roll = self.rng.random()
+        if roll < self.retry_after_rate:
+            raise RetryAfter(1)
+        if roll < self.retry_after_rate + self.error_rate:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        self.sent += 1
+
+
+class FakeBotApiServer:
+    """Bot API를 흉내 내는 로컬 HTTP/1.1 서버 (keep-alive 지원). sendMessage는 latency만큼 늦게 응답한다."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.server = None
+        self.url = None
+        self.connections = 0  # 지금까지 열린 TCP 연결 수 (keep-alive 재사용 확인용)
+        self.requests = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0, backlog=1024)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/bot"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+                length = 0
+                for line in head[1:]:
+                    name, _, value = line.partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                method = head[0].split()[1].rsplit("/", 1)[-1]
+                if method == "getMe":
+                    result = {"id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+                elif method == "sendMessage":
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    result = {"message_id": self.requests, "date": int(time.time()), "chat": {"id": 1, "type": "private"}}
+                else:
+                    result = True
+                body = json.dumps({"ok": True, "result": result}).encode("utf-8")
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n" % len(body) + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+class FakeChat:
+    def __init__(self, chat_id):
+        self.id = chat_id
+        self.type = "private"
+
+
+class FakeMessage:
+    def __init__(self, chat_id, text):
+        self.chat_id = chat_id
+        self.text = text
+        self.chat = FakeChat(chat_id)
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append(text)
+        return FakeMessage(self.chat_id, text)
+
+    async def edit_text(self, text, **kwargs):
+        self.text = text
+
+
+class FakeUpdate:
+    def __init__(self, chat_id, text):
+        self.message = FakeMessage(chat_id, text)
+        self.effective_chat = self.message.chat
+
+
+class FakeApplication:
+    def __init__(self, bot):
+        self.bot = bot
+        self.bot_data = {}
+        self.tasks = []
+
+    def create_task(self, coroutine, update=None):
+        task = asyncio.create_task(coroutine)
+        self.tasks.append(task)
+        return task
+
+    async def wait_tasks(self):
+        """핸들러가 백그라운드로 넘긴 작업(/noti 전송 등)이 끝날 때까지 대기."""
+        tasks, self.tasks = self.tasks, []
+        await asyncio.gather(*tasks)
+
+
+class FakeContext:
+    def __init__(self, application, args):
+        self.application = application
+        self.bot = application.bot
+        self.args = args
+        self.user_data = {}
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "mean": statistics.fmean(ordered),
+    }
+
+
+async def run_benchmarks(main, owner, args, rng):
+    results = {}
+    bot = FakeBot(args.latency, args.error_rate, args.retry_after_rate, rng)
+    application = owner.application = FakeApplication(bot)
+    original_subscribers = set(owner.subscribers.user_ids)
+
+    # 측정 중에는 텔레그램 속도 제한 대신 인자로 받은 값을 사용
+    main.broadcaster = main.Broadcaster(concurrency=args.concurrency, rate=args.rate)
+
+    def reset_subscribers():
+        # 차단 응답으로 빠진 구독자를 되돌려 매 측정의 대상 수를 같게 유지
+        owner.subscribers.user_ids = set(original_subscribers)
+        owner.subscribers.added.clear()
+        owner.subscribers.removed.clear()
+        # 직전 측정의 단톡방 전송 간격(GROUP_CHAT_INTERVAL) 대기가 다음 측정에 섞이지 않도록 초기화
+        main.broadcaster.next_allowed.clear()
+
+    async def measure(name, func, setup=None):
+        samples = []
+        for i in range(args.repeat):
+            if setup is not None:
+                setup(i)
+            started = time.perf_counter()
+            await func(i)
+            samples.append(time.perf_counter() - started)
+        results[name] = summarize(samples)
+        print(f"{name:<28} median {results[name]['median'] * 1000:10.2f} ms  (min {results[name]['min'] * 1000:.2f} ms)")
+
+    # 알림 루프 한 번: 방금 알림 시각이 된 일정 하나를 꺼내 전체 구독자에게 전송
+    def add_due_event(i):
+        reset_subscribers()
+        event_time = datetime.now(KST).replace(second=0, microsecond=0) + timedelta(days=1, minutes=-10)
+        main.reminder_scheduler.add(main.Schedule.from_datetime(event_time, f"측정 알림 {i}"))
+
+    async def notify_tick(i):
+        now = time.time()
+        for _, schedule, kind, fire_ts in main.reminder_scheduler.pop_due(now):
+            await main.send_reminder(schedule, kind, fire_ts)
+
+    await measure("notify_tick", notify_tick, add_due_event)
+
+    async def reminder_reload(i):
+        main.reminder_scheduler.reload(owner.schedule_index.items)
+
+    await measure("reminder_reload", reminder_reload)
+
+    # 지난 일정 정리: 매번 --expire개의 일정이 시각을 지난 상태로 만든 뒤 실행
+    def add_expired_events(i):
+        now = datetime.now(KST).replace(second=0, microsecond=0)
+        for j in range(args.expire):
+            owner.schedule_index.add(main.Schedule.from_datetime(now - timedelta(minutes=j + 1), f"만료 {i}-{j}"))
+
+    async def update_schedule(i):
+        await main.update_schedule()
+
+    await measure("update_schedule", update_schedule, add_expired_events)
+    await measure("update_schedule_idle", update_schedule)
+
+    async def list_command(i):
+        await main.list_schedules(FakeUpdate(ADMIN_CHAT_ID, "/list"), FakeContext(application, []))
+
+    async def history365_command(i):
+        await main.view_history_365(FakeUpdate(ADMIN_CHAT_ID, "/history365"), FakeContext(application, []))
+
+    await measure("list_cold", list_command, lambda i: owner.render_cache.invalidate())
+    await measure("list_warm", list_command)
+    await measure("history365_cold", history365_command, lambda i: owner.render_cache.invalidate())
+    await measure("history365_warm", history365_command)
+
+    async def noti_command(i):
+        await main.notice(FakeUpdate(ADMIN_CHAT_ID, "/noti 측정용 공지"), FakeContext(application, ["측정용", "공지"]))
+        await application.wait_tasks()
+
+    await measure("noti_fanout", noti_command, lambda i: reset_subscribers())
+
+    # 예약된 구독자 저장은 측정 대상이 아니므로 취소
+    if owner.subscribers.flush_task is not None:
+        owner.subscribers.flush_task.cancel()
+
+    if args.api:
+        await run_api_benchmarks(main, args, results)
+    return results, bot.sent
+
+
+async def run_api_benchmarks(main, args, results):
+    """가짜 Bot API 서버에 실제 HTTP로 보내며 Bot의 요청(연결 풀) 설정별 전송 속도를 비교."""
+    from telegram import Bot
+    from telegram.ext import Application
+
+    server = FakeBotApiServer(args.api_latency)
+    await server.start()
+    token = "123456:bench"
+    variants = (
+        # PTB 기본 Bot(): 연결 1개, 풀 대기 1초
+        ("api_fanout_ptb_bot", lambda: Bot(token, base_url=server.url)),
+        # Application.builder() 기본값: 연결 256개, httpx 기본 keep-alive(5초)
+        ("api_fanout_builder", lambda: Application.builder().token(token).base_url(server.url).build().bot),
+        # main.make_request 설정: 동시 전송 수만큼 연결, 긴 keep-alive, 풀 대기 HTTP_POOL_TIMEOUT
+        ("api_fanout_tuned", lambda: main.Bot(token, base_url=server.url, request=main.make_request(args.concurrency))),
+    )
+    next_chat_id = itertools.count(1_000_000)
+    try:
+        for name, make_bot in variants:
+            bot = make_bot()
+            await bot.initialize()
+            connections = server.connections
+            failed = 0
+
+            async def fanout(i):
+                nonlocal failed
+                # 같은 채팅방 전송 간격(PRIVATE_CHAT_INTERVAL) 대기가 섞이지 않도록 매번 새 chat_id 사용
+                chat_ids = [next(next_chat_id) for _ in range(args.api_messages)]
+                result = await main.broadcaster.broadcast(bot, chat_ids, "측정용 메시지", kind="bench")
+                failed += len(result.failed)
+
+            samples = []
+            for i in range(args.repeat):
+                started = time.perf_counter()
+                await fanout(i)
+                samples.append(time.perf_counter() - started)
+            await bot.shutdown()
+
+            results[name] = summarize(samples)
+            results[name]["messages_per_second"] = args.api_messages / results[name]["median"]
+            results[name]["failed"] = failed
+            results[name]["connections"] = server.connections - connections
+            print(
+                f"{name:<28} median {results[name]['median'] * 1000:10.2f} ms  "
+                f"({results[name]['messages_per_second']:.0f} msg/s, 실패 {failed}건, 새 연결 {results[name]['connections']}개)"
+            )
+    finally:
+        await server.stop()
+
+
+def compare(report, previous, threshold):
+    """이전 보고서 대비 중앙값 변화를 출력하고 느려진 항목 목록을 반환."""
+    if previous["meta"]["args"] != report["meta"]["args"]:
+        print("⚠️ 이전 보고서와 측정 조건이 달라 비교 결과가 정확하지 않을 수 있습니다.")
+    regressions = []
+    print(f"\n{'항목':<28} {'이전(ms)':>10} {'현재(ms)':>10} {'변화':>8}")
+    for name, result in report["results"].items():
+        old = previous["results"].get(name)
+        if old is None:
+            continue
+        ratio = result["median"] / old["median"] if old["median"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = "  ⚠️ 느려짐"
+        print(f"{name:<28} {old['median'] * 1000:10.2f} {result['median'] * 1000:10.2f} {ratio - 1:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    # 측정 중 작업 디렉터리를 옮기므로 상대 경로는 실행한 위치 기준으로 미리 고정
+    args.output = os.path.abspath(args.output)
+    if args.compare:
+        args.compare = os.path.abspath(args.compare)
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix="ktu_bench_")
+    os.environ["STORAGE_BACKEND"] = args.storage
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.pop("METRICS_PORT", None)
+
+    try:
+        started = time.perf_counter()
+        make_dataset(workdir, args, rng)
+        print(f"가상 데이터 생성: {time.perf_counter() - started:.2f}초 ({workdir})")
+
+        # 작업 디렉터리의 데이터를 쓰는 테넌트 하나로 측정
+        os.chdir(workdir)
+        sys.path.insert(0, BASE_DIR)
+        started = time.perf_counter()
+        import main as bot_main
+        owner = bot_main.Tenant("bench", "bench")
+        bot_main.tenants.append(owner)
+        bot_main.current_tenant.set(owner)
+        startup = time.perf_counter() - started
+        bot_main.setup_logging()
+        print(f"{'startup':<28} {startup * 1000:10.2f} ms")
+
+        results, sent = asyncio.run(run_benchmarks(bot_main, owner, args, rng))
+        results["startup"] = summarize([startup])
+    finally:
+        os.chdir(BASE_DIR)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "keep")},
+            "messages_sent": sent,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=4)
+    print(f"\n보고서 저장: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            previous = json.load(file)
+        regressions = compare(report, previous, args.threshold)
+        if regressions:
+            print(f"\n❌ 느려진 항목: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
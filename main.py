@@ -1,11 +1,30 @@
-from telegram import Update
-from telegram.ext import Application, CommandHandler, ContextTypes
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import Application, BaseUpdateProcessor, CallbackQueryHandler, CommandHandler, ContextTypes
 from telegram.ext import MessageHandler, filters
+from telegram.request import HTTPXRequest
+from telegram.error import BadRequest, ChatMigrated, Forbidden, NetworkError, RetryAfter, TelegramError, TimedOut
 import asyncio
+import bisect
+import contextvars
+import heapq
+import importlib.util
+import itertools
 import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import time
+import zlib
 from datetime import datetime, timedelta
+import httpx
 from pytz import timezone
-from functools import wraps
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache, wraps
 
 # JSON 파일 경로
 DATA_FILE = "schedules.json"
@@ -13,29 +32,499 @@ HISTORY_FILE = "past_schedules.json"
 USER_ID_FILE = "user_ids.json"  # 사용자 ID를 저장할 파일
 MUTE_FILE = "mute_schedules.json"
 ADMIN_FILE = "admins.json"  # 관리자 ID 저장 파일
+NOTIFIED_FILE = "notified_schedules.json"  # 이전 버전의 발송 기록 파일 (처음 실행 시 작업 큐로 옮김)
+REMINDER_JOB_FILE = "reminder_jobs.json"  # 알림 발송 작업 큐 파일
+
+# 저장 방식: "json" (기본) 또는 "sqlite" (기존 파일은 `python main.py migrate`로 옮김)
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "json")
+DB_FILE = "bot.db"  # SQLite 데이터베이스 파일
+
+# 여러 봇(지부)을 한 프로세스에서 실행할 때의 설정 파일 (형식은 Docker_Guide.txt 참고)
+# [{"name": ..., "token": ..., "data_dir": ..., "admin_password": ..., "display_name": ...}]
+# 파일이 없으면 현재 디렉터리의 데이터를 쓰는 봇 하나만 실행
+TENANTS_FILE = os.environ.get("TENANTS_FILE", "tenants.json")
+
+# 로그 설정 (환경 변수로 조정)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")  # DEBUG로 바꾸면 알림·전송 실패를 건별로 기록 (샘플링)
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")  # "json"이면 한 줄에 JSON 객체 하나씩 출력
+LOG_SAMPLE_INTERVAL = 60  # 같은 종류의 건별 로그를 묶는 구간(초)
+LOG_SAMPLE_BURST = 5  # 구간마다 그대로 남기는 건별 로그 수 (나머지는 생략 건수만 기록)
+
+# 지표(/metrics) 서버 설정: METRICS_PORT를 지정한 경우에만 켜짐
+METRICS_PORT = int(os.environ["METRICS_PORT"]) if os.environ.get("METRICS_PORT") else None
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")  # 기본값은 로컬에서만 접근 가능
+
+# 웹훅 모드 설정: WEBHOOK_URL(텔레그램이 접속할 공개 주소)을 지정하면 run_polling 대신 웹훅으로 업데이트를 받음
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL")  # 예) https://bot.example.com/telegram
+WEBHOOK_LISTEN = os.environ.get("WEBHOOK_LISTEN", "127.0.0.1")  # 리버스 프록시 뒤에서 받을 주소
+WEBHOOK_PORT = int(os.environ.get("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.environ.get("WEBHOOK_PATH", "telegram")  # 로컬 서버의 경로 (WEBHOOK_URL의 경로와 맞춤)
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET")  # X-Telegram-Bot-Api-Secret-Token 헤더 값 (A-Z, a-z, 0-9, _, -)
+WEBHOOK_MAX_CONNECTIONS = int(os.environ.get("WEBHOOK_MAX_CONNECTIONS", "40"))  # 텔레그램이 동시에 여는 연결 수 (1~100)
 
 # 시간대 설정 (한국 표준시)
 KST = timezone("Asia/Seoul")
 
+# 저널에 쌓인 변경 기록이 이 수를 넘으면 스냅샷을 다시 씀
+JOURNAL_COMPACT_THRESHOLD = 200
+
+# 긴 응답 나누기 (텔레그램 메시지 최대 길이 4096자)
+MESSAGE_LIMIT = 4096
+PAGE_SIZE = 30  # /list, /history 한 페이지에 보여줄 최대 일정 수 (길이 제한을 넘으면 더 적게)
+PAGE_LINE_OVERHEAD = 27  # 일정 한 줄에서 번호·설명을 뺀 길이의 상한 (". " + 시각 최대 20자 + " - " + mute 표시 + 줄바꿈)
+
+# 브로드캐스트 설정 (텔레그램 제한: 전체 초당 30건, 같은 채팅방 초당 1건, 단톡방 분당 20건)
+BROADCAST_CONCURRENCY = 20  # 동시에 전송할 최대 건수
+GLOBAL_RATE_LIMIT = 30  # 초당 전체 전송 건수
+PRIVATE_CHAT_INTERVAL = 1.0  # 같은 개인 채팅에 연속 전송 시 최소 간격(초)
+GROUP_CHAT_INTERVAL = 3.0  # 같은 단톡방에 연속 전송 시 최소 간격(초)
+BROADCAST_MAX_RETRIES = 3  # 일시적 오류 시 재시도 횟수
+
+# 큰 브로드캐스트를 여러 프로세스로 나눠 보내는 설정: DELIVERY_PROCESSES가 0이면 이벤트 루프 하나에서 모두 보냄
+DELIVERY_PROCESSES = int(os.environ.get("DELIVERY_PROCESSES", "0"))  # 전송 작업자 프로세스 수
+DELIVERY_POOL_MIN = int(os.environ.get("DELIVERY_POOL_MIN", "5000"))  # 대상이 이보다 적으면 작업자를 쓰지 않음
+DELIVERY_CHUNK_SIZE = 1000  # 작업자에게 한 번에 넘기는 chat_id 수 (진행 상황은 묶음마다 반영)
+
+# 텔레그램 Bot API 주소 (로컬 Bot API 서버나 측정용 가짜 서버를 쓸 때 변경)
+BOT_API_URL = os.environ.get("BOT_API_URL", "https://api.telegram.org/bot")
+
+BROADCAST_PROGRESS_INTERVAL = 5  # /noti 전송 중 진행 상황 메시지를 고치는 간격(초)
+
+# 클러스터 모드: CLUSTER_DB(SQLite 파일)를 같이 쓰는 여러 프로세스 중 리더 하나가 업데이트를 받고 알림 시각을 계산하며,
+# 알림 발송은 chat_id 해시로 나눈 샤드별로 모든 프로세스가 나눠 맡음. 지정하지 않으면 프로세스 하나로 모두 처리
+CLUSTER_DB = os.environ.get("CLUSTER_DB")  # 예) cluster.db (모든 프로세스가 같은 파일을 가리켜야 함)
+CLUSTER_SHARDS = int(os.environ.get("CLUSTER_SHARDS", "2"))  # 구독자를 나눌 샤드 수 (보통 프로세스 수와 같게)
+CLUSTER_RATE_LIMIT = float(os.environ.get("CLUSTER_RATE_LIMIT", GLOBAL_RATE_LIMIT))  # 봇 하나의 클러스터 전체 초당 전송 건수
+LEASE_TTL = 15  # 리더·샤드 임대 유효 시간(초). 이 시간 동안 갱신이 없으면 다른 프로세스가 넘겨받음
+LEASE_RENEW_INTERVAL = 5  # 임대 갱신 간격(초)
+CLUSTER_POLL_INTERVAL = 0.5  # 발송 작업 확인 간격(초)
+
+UPDATE_CONCURRENCY = 64  # 동시에 처리할 최대 업데이트 수 (같은 채팅방의 업데이트는 받은 순서대로 하나씩)
+
+# Bot API HTTP 연결 설정. 업데이트 수신(getUpdates)과 전송은 연결 풀을 따로 쓰므로 long polling이 전송 연결을 차지하지 않음
+HTTP_VERSION = os.environ.get("HTTP_VERSION", "1.1")  # "2"는 python-telegram-bot[http2] 설치 필요 (없으면 1.1로 동작)
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", BROADCAST_CONCURRENCY + UPDATE_CONCURRENCY))  # 전송용 연결 수
+HTTP_POOL_TIMEOUT = float(os.environ.get("HTTP_POOL_TIMEOUT", "10"))  # 풀의 연결이 모두 사용 중일 때 기다리는 시간(초)
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "10"))
+HTTP_WRITE_TIMEOUT = float(os.environ.get("HTTP_WRITE_TIMEOUT", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "60"))  # 쉬는 연결을 유지하는 시간(초). 알림 사이에도 재연결 없이 재사용
+
+USER_ID_FLUSH_INTERVAL = 5  # 구독자 목록을 모아서 저장하는 간격(초)
+
+# 알림 종류: (이름, 일정 몇 시간 전, 표시 문구, 알림 시각이 지난 뒤에도 예약할 수 있는 시간)
+REMINDER_OFFSETS = (
+    ("week", timedelta(weeks=1), "일주일 전", timedelta(days=1)),
+    ("day", timedelta(days=1), "하루 전", timedelta(hours=1)),
+    ("hour", timedelta(hours=3), "3시간 전", timedelta(minutes=1)),
+)
+REMINDER_MAX_SLEEP = 3600  # 시스템 시간 변경에 대비한 최대 대기 시간(초)
+
+# 봇이 꺼져 있는 동안 알림 구간이 지나간 알림 처리 방식 (일정이 아직 시작 전인 경우)
+# - "latest": 일정마다 가장 최근에 지난 알림 하나만 보냄 (기본값)
+# - "all": 지난 알림을 모두 보냄
+# - "window": 알림 구간(REMINDER_OFFSETS의 마지막 값) 안에 있는 알림만 보냄
+REMINDER_CATCHUP = os.environ.get("REMINDER_CATCHUP", "latest")
+
+logger = logging.getLogger("ktu_gg_alert")
+
+# LogRecord 기본 속성 (JSON 로그에서 extra로 넘긴 필드만 골라내기 위해 사용)
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """로그 한 건을 JSON 한 줄로 출력. extra로 넘긴 필드도 함께 기록."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, KST).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def setup_logging():
+    handler = logging.StreamHandler()
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logging.basicConfig(level=LOG_LEVEL.upper(), handlers=[handler], force=True)
+    # httpx는 요청마다 INFO 로그를 남겨 getUpdates 폴링만으로도 로그가 쌓이므로 경고 이상만 기록
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+class LogSampler:
+    """같은 종류(key)의 건별 로그를 구간마다 처음 몇 건만 남기고 나머지는 생략 건수로 요약."""
+
+    def __init__(self, interval=LOG_SAMPLE_INTERVAL, burst=LOG_SAMPLE_BURST):
+        self.interval = interval
+        self.burst = burst
+        self.windows = {}  # key -> [구간 시작 시각, 건수]
+
+    def log(self, level, key, message, *args, **kwargs):
+        if not logger.isEnabledFor(level):
+            return  # 해당 레벨이 꺼져 있으면 포맷 비용 없이 바로 반환
+        now = time.monotonic()
+        window = self.windows.get(key)
+        if window is None or now - window[0] >= self.interval:
+            if window is not None and window[1] > self.burst:
+                logger.log(level, "%s 로그 %d건 생략 (최근 %d초)", key, window[1] - self.burst, self.interval)
+            window = self.windows[key] = [now, 0]
+        window[1] += 1
+        if window[1] <= self.burst:
+            logger.log(level, message, *args, **kwargs)
+
+log_sampler = LogSampler()
+
+# Prometheus 텍스트 형식 지표
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LONG_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800)  # 브로드캐스트, 알림 지연
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_text(names, values, extra=()):
+    """레이블을 {name="value",...} 형식으로 변환."""
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.values = {}  # 레이블 값 튜플 -> 누적 값
+
+    def inc(self, *labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {value}")
+        return lines
+
+class Gauge:
+    """렌더링할 때 함수를 호출해 현재 값을 읽는 지표."""
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.read()}"]
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self.values = {}  # 레이블 값 튜플 -> [구간별 건수..., +Inf 구간 건수, 합계, 전체 건수]
+
+    def observe(self, value, *labels):
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [0] * (len(self.buckets) + 3)
+        entry[bisect.bisect_left(self.buckets, value)] += 1  # 가장 큰 구간보다 크면 +Inf 칸
+        entry[-2] += value
+        entry[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, entry in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, [('le', '+Inf')])} {entry[-1]}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {entry[-2]}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {entry[-1]}")
+        return lines
+
+class Metrics:
+    """봇 동작 지표 모음. METRICS_PORT가 지정되면 /metrics로 내보낸다."""
+
+    def __init__(self):
+        self.handler_duration = Histogram(
+            "bot_handler_duration_seconds", "명령어 처리 시간", ("command",)
+        )
+        self.handler_errors = Counter("bot_handler_errors_total", "처리 중 예외가 난 명령어 수", ("command",))
+        self.broadcast_duration = Histogram(
+            "bot_broadcast_duration_seconds", "브로드캐스트 한 건의 전체 전송 시간", ("kind",), LONG_BUCKETS
+        )
+        self.messages = Counter("bot_messages_total", "전송 결과별 메시지 수 (result: ok 또는 오류 종류)", ("result",))
+        self.send_retries = Counter("bot_send_retries_total", "재시도한 전송 수")
+        self.reminder_lag = Histogram(
+            "bot_reminder_lag_seconds", "예정된 알림 시각과 실제 발송 시각의 차이", ("kind",), LONG_BUCKETS
+        )
+        self.update_schedule_duration = Histogram("bot_update_schedule_duration_seconds", "지난 일정 정리(update_schedule) 시간")
+        self.loop_iterations = Counter("bot_loop_iterations_total", "백그라운드 루프 실행 횟수", ("loop",))
+        self.loop_errors = Counter("bot_loop_errors_total", "백그라운드 루프 예외 수", ("loop",))
+        self.gauges = []
+        self.server = None
+
+    def gauge(self, name, help_text, read):
+        self.gauges.append(Gauge(name, help_text, read))
+
+    def render(self):
+        collectors = (
+            self.handler_duration, self.handler_errors, self.broadcast_duration, self.messages, self.send_retries,
+            self.reminder_lag, self.update_schedule_duration, self.loop_iterations, self.loop_errors, *self.gauges,
+        )
+        return "\n".join(line for collector in collectors for line in collector.render()) + "\n"
+
+    def record_broadcast(self, kind, result):
+        self.broadcast_duration.observe(result.elapsed, kind)
+        if result.delivered:
+            self.messages.inc("ok", amount=len(result.delivered))
+        for name, count in result.error_counts().items():
+            self.messages.inc(name, amount=count)
+        if result.retries:
+            self.send_retries.inc(amount=result.retries)
+
+    def timed(self, command, callback):
+        """핸들러 콜백을 감싸 처리 시간과 예외 수를 기록."""
+        @wraps(callback)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await callback(*args, **kwargs)
+            except Exception:
+                self.handler_errors.inc(command)
+                raise
+            finally:
+                self.handler_duration.observe(time.perf_counter() - started, command)
+        return wrapper
+
+    def instrument(self, application):
+        """등록된 모든 핸들러의 콜백을 timed()로 감쌈."""
+        for handlers in application.handlers.values():
+            for handler in handlers:
+                if isinstance(handler, CommandHandler):
+                    command = "/".join(sorted(handler.commands))
+                else:
+                    command = getattr(handler.callback, "__name__", type(handler).__name__)
+                handler.callback = self.timed(command, handler.callback)
+
+    async def _serve(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # 요청 헤더는 사용하지 않음
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.warning("/metrics 요청 처리 실패: %s", e)
+        finally:
+            writer.close()
+
+    async def start_server(self, host, port):
+        self.server = await asyncio.start_server(self._serve, host, port)
+        logger.info("지표 서버 시작: http://%s:%d/metrics", host, port)
+
+    async def stop_server(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+metrics = Metrics()
+
+# 시간 표시 형식 (모든 응답과 알림이 함께 사용)
+# - "full": 24/12/25(수) 오전 09:00 (일정 추가·수정·삭제 응답)
+# - "short": 올해 일정은 12/25(수) 오전 09:00, 다른 해는 YY/MM/DD (/list, /history)
+# - "reminder": 24/12/25(수) 오전 9:00 (알림 메시지, 시 앞의 0 생략)
+WEEKDAY_KO = ("월", "화", "수", "목", "금", "토", "일")
+AM_PM_KO = ("오전",) * 12 + ("오후",) * 12
+HOUR_12 = tuple(f"{hour % 12 or 12:02d}" for hour in range(24))
+
+@lru_cache(maxsize=8192)
+def _format_minute(minute, style, current_year):
+    """분 단위 시각(epoch 분) 하나를 한국어 형식으로 변환 (분·형식·올해 기준으로 메모)."""
+    event_time = datetime.fromtimestamp(minute * 60, KST)
+    if style == "short" and event_time.year == current_year:
+        date = f"{event_time.month:02d}/{event_time.day:02d}"
+    else:
+        date = f"{event_time.year % 100:02d}/{event_time.month:02d}/{event_time.day:02d}"
+    hour = HOUR_12[event_time.hour]
+    if style == "reminder":
+        hour = hour.lstrip("0")
+    return f"{date}({WEEKDAY_KO[event_time.weekday()]}) {AM_PM_KO[event_time.hour]} {hour}:{event_time.minute:02d}"
+
+def format_event_times(timestamps, style="full"):
+    """여러 일정 시각(epoch 초)을 한 번에 변환. 올해 연도는 한 번만 계산."""
+    current_year = datetime.now(KST).year
+    return [_format_minute(int(timestamp) // 60, style, current_year) for timestamp in timestamps]
+
+def format_event_time(timestamp, style="full"):
+    return format_event_times((timestamp,), style)[0]
+
+def open_database(db_path):
+    """SQLite 데이터베이스를 WAL 모드로 열고 테이블과 인덱스를 준비."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with conn:
+        for table in ("schedules", "history"):
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "id INTEGER PRIMARY KEY, ts INTEGER NOT NULL, time TEXT NOT NULL, description TEXT NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_ts ON {table} (ts)")
+        conn.execute("CREATE TABLE IF NOT EXISTS users (chat_id INTEGER PRIMARY KEY)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS admins (id INTEGER PRIMARY KEY, chat_id INTEGER NOT NULL UNIQUE, name TEXT NOT NULL)"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS mutes (schedule_id TEXT PRIMARY KEY)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS reminder_jobs (schedule_id TEXT NOT NULL, kind TEXT NOT NULL, "
+            "fire_ts REAL NOT NULL, state TEXT NOT NULL, delivered TEXT NOT NULL, PRIMARY KEY (schedule_id, kind))"
+        )
+    return conn
+
+def replace_rows(conn, table, columns, rows):
+    """테이블 내용을 rows로 통째로 교체 (한 트랜잭션)."""
+    with conn:
+        conn.execute(f"DELETE FROM {table}")
+        conn.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows
+        )
+
+# 지금 처리 중인 테넌트(봇). 업데이트 처리기와 백그라운드 루프가 설정하며 asyncio 태스크마다 따로 유지된다.
+current_tenant = contextvars.ContextVar("current_tenant")
+
+def tenant():
+    return current_tenant.get()
+
+@contextmanager
+def use_tenant(target):
+    """with 블록 안에서 target을 현재 테넌트로 사용."""
+    token = current_tenant.set(target)
+    try:
+        yield target
+    finally:
+        current_tenant.reset(token)
+
 def load_admins():
     """JSON 파일에서 관리자 목록 불러오기."""
+    database = tenant().database
+    if database is not None:
+        rows = database.execute("SELECT name, chat_id FROM admins ORDER BY id")
+        return [{"name": name, "chat_id": chat_id} for name, chat_id in rows]
     try:
-        with open(ADMIN_FILE, "r", encoding="utf-8") as file:
+        with open(tenant().path(ADMIN_FILE), "r", encoding="utf-8") as file:
             return json.load(file)  # 관리자 목록 반환
     except FileNotFoundError:
         return []  # 파일이 없으면 빈 리스트 반환
 
 def save_admins(admin_list):
     """관리자 목록을 JSON 파일에 저장."""
-    with open(ADMIN_FILE, "w", encoding="utf-8") as file:
-        json.dump(admin_list, file, ensure_ascii=False, indent=4)
+    database = tenant().database
+    if database is not None:
+        replace_rows(database, "admins", ("name", "chat_id"), [(admin["name"], admin["chat_id"]) for admin in admin_list])
+        return
+    save_data(tenant().path(ADMIN_FILE), admin_list)
+
+class AdminRegistry:
+    """관리자 목록을 메모리에 보관하는 캐시.
 
-ADMIN_PASSWORD = "0000"  # 설정할 관리자 비밀번호
+    chat_id 기준 딕셔너리로 권한을 확인하고, 파일의 mtime·inode가 바뀐 경우에만 다시 읽는다.
+    """
+
+    CHECK_INTERVAL = 5  # 파일 변경 여부를 확인하는 최소 간격(초)
+
+    def __init__(self):
+        self.admins = []  # 등록 순서 유지 (/adminlist, /admindel 번호)
+        self.by_chat_id = {}
+        self.signature = False  # 아직 불러오지 않음
+        self.checked_at = None
+
+    @staticmethod
+    def _file_signature():
+        if tenant().database is not None:
+            return "sqlite"  # 데이터베이스는 이 프로세스에서만 수정
+        try:
+            stat = os.stat(tenant().path(ADMIN_FILE))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def _index(self):
+        self.by_chat_id = {admin["chat_id"]: admin for admin in self.admins}
+
+    def refresh(self):
+        """마지막 확인 후 일정 시간이 지났고 파일이 바뀌었으면 다시 읽기."""
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < self.CHECK_INTERVAL:
+            return
+        self.checked_at = now
+        signature = self._file_signature()
+        if signature != self.signature:
+            self.admins = load_admins()
+            self._index()
+            self.signature = signature
+
+    def save(self):
+        save_admins(self.admins)
+        self.signature = self._file_signature()
+        self._index()
+
+    def is_admin(self, chat_id):
+        self.refresh()
+        return chat_id in self.by_chat_id
+
+    def list(self):
+        self.refresh()
+        return self.admins
+
+    def add(self, name, chat_id):
+        self.refresh()
+        self.admins.append({"name": name, "chat_id": chat_id})
+        self.save()
+
+    def remove(self, index):
+        """번호(0부터)로 관리자를 삭제하고 삭제된 항목을 반환."""
+        self.refresh()
+        deleted = self.admins.pop(index)
+        self.save()
+        return deleted
+
+    def migrate_chat_ids(self, migrated):
+        """chat_id가 바뀐 관리자(단톡방)를 새 chat_id로 갱신. 새 chat_id가 이미 등록되어 있으면 예전 항목만 삭제."""
+        registered = {admin["chat_id"] for admin in self.admins}
+        admins = []
+        for admin in self.admins:
+            new_chat_id = migrated.get(admin["chat_id"])
+            if new_chat_id is not None:
+                if new_chat_id in registered:
+                    continue  # chat_id는 중복될 수 없으므로(SQLite UNIQUE) 바꾸지 않고 삭제
+                registered.add(new_chat_id)
+                admin["chat_id"] = new_chat_id
+            admins.append(admin)
+        self.admins = admins
+        self.save()
+
+ADMIN_PASSWORD = "0000"  # 설정할 관리자 비밀번호 (tenants.json에서 봇마다 바꿀 수 있음)
+BOT_DISPLAY_NAME = "전교조 경기지부 일정 알림 봇"  # /start 인사말의 봇 이름 (tenants.json의 display_name으로 바꿀 수 있음)
 
 async def admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.message.chat_id
     chat_type = update.message.chat.type
-    admins = load_admins()
 
     # 단톡방에서 실행된 경우 안내 메시지 출력
     if chat_type in ["group", "supergroup"]:
@@ -45,7 +534,7 @@ async def admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # 개인 채팅에서만 관리자 등록 가능
-    if any(admin['chat_id'] == chat_id for admin in admins):
+    if tenant().admin_registry.is_admin(chat_id):
         await update.message.reply_text("✅ 이미 관리자로 등록된 계정입니다.")
         return
 
@@ -58,7 +547,6 @@ async def adminroom_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.message.chat_id
     chat_type = update.message.chat.type
     args = context.args
-    admins = load_admins()
 
     # 단톡방이 아닌 경우 처리
     if chat_type not in ["group", "supergroup"]:
@@ -71,28 +559,26 @@ async def adminroom_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     password, room_name = args[0], " ".join(args[1:])
-    if password != ADMIN_PASSWORD:
+    if password != tenant().admin_password:
         await update.message.reply_text("❌ 비밀번호가 올바르지 않습니다.")
         return
 
     # 이미 관리자인지 확인
-    if any(admin['chat_id'] == chat_id for admin in admins):
+    if tenant().admin_registry.is_admin(chat_id):
         await update.message.reply_text(f"✅ 이미 단톡방에 관리 권한이 부여되어 있습니다.")
         return
 
     # 관리자 등록
-    admins.append({"name": f"{room_name}(단톡방)", "chat_id": chat_id})
-    save_admins(admins)
+    tenant().admin_registry.add(f"{room_name}(단톡방)", chat_id)
     await update.message.reply_text(f"✅ '{room_name}' 단톡방에 관리 권한을 부여하였습니다.")
 
 async def handle_user_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.message.chat_id
     text = update.message.text.strip()
-    admins = load_admins()
 
     # 비밀번호 확인 상태
     if context.user_data.get("admin_state") == "awaiting_password":
-        if text == ADMIN_PASSWORD:
+        if text == tenant().admin_password:
             context.user_data["admin_state"] = "awaiting_name"
             await update.message.reply_text("✅ 비밀번호가 확인되었습니다. 이름을 입력해주세요:")
         else:
@@ -105,24 +591,19 @@ async def handle_user_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
         admin_name = text
 
         # 관리자 추가
-        admins.append({"name": admin_name, "chat_id": chat_id})
-        save_admins(admins)  # 관리자 목록 저장
+        tenant().admin_registry.add(admin_name, chat_id)  # 관리자 목록 저장
         await update.message.reply_text(f"✅ {admin_name}님이 관리자로 등록되었습니다.")
     else:
         # 기타 입력은 fallback_handler로 처리
         await fallback_handler(update, context)
 
-from functools import wraps
-
 def admin_only(func):
     """관리자만 접근할 수 있도록 제한하는 데코레이터."""
     @wraps(func)
     async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
         chat_id = update.message.chat_id
-        admins = load_admins()  # 항상 최신 관리자 목록 불러오기
-
-        # 관리자 목록에서 chat_id 확인
-        if not any(admin['chat_id'] == chat_id for admin in admins):
+        # 관리자 목록에서 chat_id 확인 (파일이 바뀐 경우에만 다시 읽음)
+        if not tenant().admin_registry.is_admin(chat_id):
             await update.message.reply_text("❌ 관리 권한이 필요한 기능입니다.")
             return
 
@@ -134,7 +615,7 @@ def admin_only(func):
 @admin_only
 async def admin_list_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """관리자 목록 출력."""
-    admins = load_admins()
+    admins = tenant().admin_registry.list()
 
     if not admins:
         await update.message.reply_text("❌ 등록된 관리자가 없습니다.")
@@ -150,7 +631,7 @@ async def admin_list_command(update: Update, context: ContextTypes.DEFAULT_TYPE)
 @admin_only
 async def admin_delete_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """관리자 삭제."""
-    admins = load_admins()
+    admins = tenant().admin_registry.list()
 
     if not admins:
         await update.message.reply_text("❌ 삭제할 관리자가 없습니다.")
@@ -159,8 +640,7 @@ async def admin_delete_command(update: Update, context: ContextTypes.DEFAULT_TYP
     try:
         idx = int(context.args[0]) - 1  # 삭제할 관리자 번호
         if 0 <= idx < len(admins):
-            deleted_admin = admins.pop(idx)
-            save_admins(admins)
+            deleted_admin = tenant().admin_registry.remove(idx)
             await update.message.reply_text(f"✅ {deleted_admin['name']}님이 관리자에서 삭제되었습니다.")
         else:
             await update.message.reply_text("❌ 유효한 번호를 입력하세요.")
@@ -168,26 +648,42 @@ async def admin_delete_command(update: Update, context: ContextTypes.DEFAULT_TYP
         await update.message.reply_text("❌ 삭제할 번호를 올바르게 입력하세요.\n예) /admindel 1")
 
 def load_mute_schedules():
+    database = tenant().database
+    if database is not None:
+        return {row[0] for row in database.execute("SELECT schedule_id FROM mutes")}
     try:
-        with open(MUTE_FILE, "r", encoding="utf-8") as file:
+        with open(tenant().path(MUTE_FILE), "r", encoding="utf-8") as file:
             return set(json.load(file))
     except FileNotFoundError:
         return set()  # 파일이 없으면 빈 집합 반환
 
 def save_mute_schedules(mute_schedules):
-    with open(MUTE_FILE, "w", encoding="utf-8") as file:
+    database = tenant().database
+    if database is not None:
+        replace_rows(database, "mutes", ("schedule_id",), [(schedule_id,) for schedule_id in mute_schedules])
+        return
+    with open(tenant().path(MUTE_FILE), "w", encoding="utf-8") as file:
         json.dump(list(mute_schedules), file, ensure_ascii=False, indent=4)
 
 def load_user_ids():
+    database = tenant().database
+    if database is not None:
+        return {row[0] for row in database.execute("SELECT chat_id FROM users")}
     try:
-        with open(USER_ID_FILE, "r", encoding="utf-8") as file:
+        with open(tenant().path(USER_ID_FILE), "r", encoding="utf-8") as file:
             return set(json.load(file))  # JSON에서 사용자 ID를 불러오기
     except FileNotFoundError:
         return set()  # 파일이 없으면 빈 집합 반환
 
-def save_user_ids(user_ids):
-    with open(USER_ID_FILE, "w", encoding="utf-8") as file:
-        json.dump(list(user_ids), file, ensure_ascii=False, indent=4)  # 사용자 ID 저장
+def save_user_ids(user_ids, added=(), removed=()):
+    """사용자 ID 저장. SQLite는 바뀐 행(added, removed)만 반영하고 JSON은 파일 전체를 원자적으로 다시 씀."""
+    database = tenant().database
+    if database is not None:
+        with database:
+            database.executemany("DELETE FROM users WHERE chat_id = ?", [(chat_id,) for chat_id in removed])
+            database.executemany("INSERT OR IGNORE INTO users (chat_id) VALUES (?)", [(chat_id,) for chat_id in added])
+        return
+    save_data(tenant().path(USER_ID_FILE), sorted(user_ids), indent=None)  # 줄바꿈 없이 저장 (사용자가 많아도 작게 유지)
 
 # 일정 데이터를 저장하고 불러오는 함수
 def load_data(file_path):
@@ -197,33 +693,1309 @@ def load_data(file_path):
     except FileNotFoundError:
         return []  # 파일이 없으면 빈 리스트 반환
 
-def save_data(file_path, data):
-    with open(file_path, "w", encoding="utf-8") as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+class Schedule:
+    """일정 하나. 시각은 만들 때 한 번만 파싱해 epoch 초로 보관."""
+
+    __slots__ = ("timestamp", "time", "description", "id")
+
+    def __init__(self, time_text, description, timestamp=None):
+        if timestamp is None:
+            timestamp = int(KST.localize(datetime.strptime(time_text, "%y%m%d %H%M")).timestamp())
+        self.timestamp = timestamp  # epoch 초
+        self.time = time_text  # JSON 저장 형식 ("%y%m%d %H%M", KST)
+        self.description = description
+        self.id = time_text + "_" + description  # 고유 ID (mute 목록, 알림 기록에서 사용)
+
+    @classmethod
+    def from_datetime(cls, event_time, description):
+        return cls(event_time.strftime("%y%m%d %H%M"), description, int(event_time.timestamp()))
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["time"], data["description"])
+
+    def to_dict(self):
+        return {"time": self.time, "description": self.description}
+
+    @property
+    def datetime(self):
+        """KST 시간대의 일정 시각."""
+        return datetime.fromtimestamp(self.timestamp, KST)
+
+    def change(self, event_time, description):
+        """일정 시각과 내용을 수정 (고유 ID도 함께 바뀜)."""
+        self.__init__(event_time.strftime("%y%m%d %H%M"), description, int(event_time.timestamp()))
+
+def save_data(file_path, data, indent=4):
+    """임시 파일에 쓴 뒤 이름을 바꿔 원자적으로 저장 (쓰는 도중 종료되어도 파일이 깨지지 않음)."""
+    content = json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8")
+    temp_path = file_path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(content)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, file_path)
+    return content
+
+class JournaledList:
+    """JSON 스냅샷과 추가 전용 저널로 저장되는 일정(Schedule) 목록.
+
+    변경 사항은 저널 파일에 한 줄씩 추가하고, 저널이 길어지면 스냅샷을 원자적으로 다시 쓴 뒤 저널을 비운다.
+    저널 첫 줄에는 기준 스냅샷의 CRC를 기록해, 스냅샷 교체 직후 종료되어도 같은 변경을 두 번 적용하지 않는다.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.journal_path = file_path + ".journal"
+        self.journal_size = 0
+        self.items = self._load()
+
+    def _load(self):
+        try:
+            with open(self.file_path, "rb") as file:
+                content = file.read()
+            items = json.loads(content)
+        except FileNotFoundError:
+            content, items = b"", []
+
+        replayed = 0
+        valid_journal = False
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as file:
+                lines = file.read().splitlines()
+            if lines and json.loads(lines[0]).get("base") == zlib.crc32(content):
+                valid_journal = True
+                for line in lines[1:]:
+                    try:
+                        op = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # 기록 도중 종료된 마지막 줄은 무시
+                    self._apply(items, op)
+                    replayed += 1
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            pass
+
+        # 저널 내용을 스냅샷에 반영하고, 기준이 다른(이미 반영된) 저널은 새로 시작
+        self.items = [Schedule.from_dict(item) for item in items]
+        if replayed or not valid_journal:
+            self.compact()
+        return self.items
+
+    @staticmethod
+    def _apply(items, op):
+        """저널 기록 하나를 (JSON 형식의) 목록에 적용."""
+        if op[0] == "append":
+            items.extend(op[1])
+        elif op[0] == "set":
+            items[op[1]] = op[2]
+        elif op[0] == "remove":
+            for index in sorted(op[1], reverse=True):
+                del items[index]
+        elif op[0] == "clear":
+            items.clear()
+
+    def _write(self, op):
+        with open(self.journal_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(op, ensure_ascii=False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self.journal_size += 1
+        if self.journal_size >= JOURNAL_COMPACT_THRESHOLD:
+            self.compact()
+
+    def _index_of(self, item):
+        return next(i for i, existing in enumerate(self.items) if existing is item)
+
+    def compact(self):
+        """현재 목록을 스냅샷으로 저장하고 저널을 비움."""
+        content = save_data(self.file_path, [item.to_dict() for item in self.items])
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(json.dumps({"base": zlib.crc32(content)}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.journal_path)
+        self.journal_size = 0
+
+    def append(self, item):
+        self.extend([item])
+
+    def extend(self, items):
+        if items:
+            self.items.extend(items)
+            self._write(["append", [item.to_dict() for item in items]])
+
+    def update(self, item):
+        """제자리에서 수정한 항목을 기록."""
+        self._write(["set", self._index_of(item), item.to_dict()])
+
+    def remove(self, item):
+        self.remove_many([item])
+
+    def remove_many(self, items):
+        targets = {id(item) for item in items}
+        indices = [i for i, existing in enumerate(self.items) if id(existing) in targets]
+        if indices:
+            self.items[:] = [item for item in self.items if id(item) not in targets]
+            self._write(["remove", indices])
+
+    def clear(self):
+        self.items.clear()
+        self.compact()
+
+    def __len__(self):
+        return len(self.items)
+
+class SqliteList:
+    """JournaledList와 같은 방식으로 쓰는 SQLite 테이블 기반 일정 목록.
+
+    cached=False이면 목록을 메모리에 올리지 않고 between()에서 ts 인덱스로 범위 조회만 한다.
+    """
+
+    def __init__(self, conn, table, cached=True):
+        self.conn = conn
+        self.table = table
+        self.cached = cached
+        self.items = []
+        self.row_ids = {}  # id(항목) -> 행 ID
+        if cached:
+            rows = conn.execute(f"SELECT id, ts, time, description FROM {table} ORDER BY ts, id")
+            for row_id, timestamp, time_text, description in rows:
+                item = Schedule(time_text, description, timestamp)
+                self.items.append(item)
+                self.row_ids[id(item)] = row_id
+
+    def append(self, item):
+        self.extend([item])
+
+    def extend(self, items):
+        with self.conn:
+            for item in items:
+                cursor = self.conn.execute(
+                    f"INSERT INTO {self.table} (ts, time, description) VALUES (?, ?, ?)",
+                    (item.timestamp, item.time, item.description),
+                )
+                if self.cached:
+                    self.items.append(item)
+                    self.row_ids[id(item)] = cursor.lastrowid
+
+    def update(self, item):
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE {self.table} SET ts = ?, time = ?, description = ? WHERE id = ?",
+                (item.timestamp, item.time, item.description, self.row_ids[id(item)]),
+            )
+
+    def remove(self, item):
+        self.remove_many([item])
+
+    def remove_many(self, items):
+        row_ids = [self.row_ids.pop(id(item)) for item in items if id(item) in self.row_ids]
+        if not row_ids:
+            return
+        with self.conn:
+            self.conn.executemany(f"DELETE FROM {self.table} WHERE id = ?", [(row_id,) for row_id in row_ids])
+        targets = {id(item) for item in items}
+        self.items[:] = [item for item in self.items if id(item) not in targets]
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute(f"DELETE FROM {self.table}")
+        self.items.clear()
+        self.row_ids.clear()
+
+    def __len__(self):
+        if self.cached:
+            return len(self.items)
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def between(self, start_ts, end_ts, offset=0, limit=None):
+        """start_ts 이상 end_ts 미만인 일정 목록 (ts 인덱스 범위 조회, offset·limit로 일부만)."""
+        return [
+            Schedule(time_text, description, timestamp)
+            for timestamp, time_text, description in self.conn.execute(
+                f"SELECT ts, time, description FROM {self.table} WHERE ts >= ? AND ts < ? ORDER BY ts, id LIMIT ? OFFSET ?",
+                (start_ts, end_ts, -1 if limit is None else limit, offset),
+            )
+        ]
+
+    def description_lengths(self, start_ts, end_ts):
+        """between()과 같은 순서로 구간 안 일정들의 설명 길이만 조회."""
+        return [
+            length for (length,) in self.conn.execute(
+                f"SELECT length(description) FROM {self.table} WHERE ts >= ? AND ts < ? ORDER BY ts, id", (start_ts, end_ts)
+            )
+        ]
+
+def migrate_json_to_sqlite(data_dir="."):
+    """data_dir의 기존 JSON 파일(일정, 지난 일정, 사용자, 관리자, mute, 알림 작업)을 SQLite 데이터베이스로 한 번에 옮김."""
+    def path(file_name):
+        return os.path.join(data_dir, file_name)
+
+    db_path = path(DB_FILE)
+    conn = open_database(db_path)
+    if any(conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() for table in ("schedules", "history", "users", "admins", "mutes")):
+        logger.error("%s에 이미 데이터가 있어 이전을 중단합니다.", db_path)
+        return
+
+    with conn:
+        for table, file_path in (("schedules", path(DATA_FILE)), ("history", path(HISTORY_FILE))):
+            conn.executemany(
+                f"INSERT INTO {table} (ts, time, description) VALUES (?, ?, ?)",
+                [(item.timestamp, item.time, item.description) for item in JournaledList(file_path).items],
+            )
+        conn.executemany("INSERT OR IGNORE INTO users (chat_id) VALUES (?)", [(chat_id,) for chat_id in load_data(path(USER_ID_FILE))])
+        conn.executemany(
+            "INSERT OR IGNORE INTO admins (name, chat_id) VALUES (?, ?)",
+            [(admin["name"], admin["chat_id"]) for admin in load_data(path(ADMIN_FILE))],
+        )
+        conn.executemany("INSERT OR IGNORE INTO mutes (schedule_id) VALUES (?)", [(schedule_id,) for schedule_id in load_data(path(MUTE_FILE))])
+        reminder_jobs = ReminderJobQueue(path(REMINDER_JOB_FILE))
+        jobs = reminder_jobs._load()
+        conn.executemany(
+            "INSERT OR IGNORE INTO reminder_jobs (schedule_id, kind, fire_ts, state, delivered) VALUES (?, ?, ?, ?, ?)",
+            [
+                (schedule_id, kind, job["fire_ts"], job["state"], json.dumps(job["delivered"]))
+                for (schedule_id, kind), job in jobs.items()
+            ] + [
+                # 이전 형식의 대기 작업은 그대로 옮겨 SQLite에서 처음 불러올 때 같은 방식으로 처리되게 함
+                (schedule_id, kind, 0, ReminderJobQueue.PENDING, "[]")
+                for schedule_id, kind in reminder_jobs.legacy_pending or ()
+            ],
+        )
+
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("schedules", "history", "users", "admins", "mutes")}
+    logger.info("SQLite 이전 완료: %s", counts)
+    conn.close()
+
+class ScheduleIndex:
+    """시각 순으로 항상 정렬된 예정 일정 목록.
+
+    추가·수정·삭제 위치는 bisect로 찾고, 사용자에게 보이는 번호로는 바로 조회한다. 저장은 store에 맡긴다.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.keys = []  # (timestamp, 순번) - items와 같은 순서
+        self.items = []
+        self.key_of = {}  # id(일정) -> 정렬 키
+        self.counter = itertools.count()
+        for item in store.items:
+            self._insert(item)
+
+    def _insert(self, item):
+        key = (item.timestamp, next(self.counter))  # 같은 시각이면 먼저 추가된 일정이 앞
+        position = bisect.bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.items.insert(position, item)
+        self.key_of[id(item)] = key
+
+    def _delete(self, item):
+        position = bisect.bisect_left(self.keys, self.key_of.pop(id(item)))
+        del self.keys[position]
+        del self.items[position]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def get(self, number):
+        """사용자에게 보이는 번호(1부터)로 일정 조회. 없으면 None."""
+        if 1 <= number <= len(self.items):
+            return self.items[number - 1]
+        return None
+
+    def has_id(self, schedule_id, timestamp):
+        """같은 고유 ID(시각·내용)를 가진 일정이 남아 있는지 (같은 시각의 일정만 확인)."""
+        position = bisect.bisect_left(self.keys, (timestamp,))
+        while position < len(self.keys) and self.keys[position][0] == timestamp:
+            if self.items[position].id == schedule_id:
+                return True
+            position += 1
+        return False
+
+    def unshared_ids(self, events):
+        """events의 ID 중 남은 일정이 쓰지 않는 ID 목록 (알림 작업을 정리해도 되는 ID)."""
+        return list({event.id for event in events if not self.has_id(event.id, event.timestamp)})
+
+    def add(self, item):
+        self.store.append(item)
+        self._insert(item)
+
+    def edit(self, item, event_time, description):
+        self._delete(item)
+        item.change(event_time, description)
+        self.store.update(item)
+        self._insert(item)
+
+    def remove(self, item):
+        self._delete(item)
+        self.store.remove(item)
+
+    def pop_expired(self, now_ts):
+        """now_ts 이전의 일정을 앞에서부터 꺼냄 (지난 일정 수에만 비례)."""
+        count = bisect.bisect_left(self.keys, (now_ts,))
+        if not count:
+            return []
+        expired = self.items[:count]
+        del self.items[:count]
+        del self.keys[:count]
+        for item in expired:
+            del self.key_of[id(item)]
+        self.store.remove_many(expired)
+        return expired
+
+    def clear(self):
+        self.keys.clear()
+        self.items.clear()
+        self.key_of.clear()
+        self.store.clear()
+
+def month_of(timestamp):
+    """epoch 초가 속한 달 (KST 기준, YYYYMM 정수)."""
+    event_time = datetime.fromtimestamp(timestamp, KST)
+    return event_time.year * 100 + event_time.month
+
+class HistoryIndex:
+    """월 단위 버킷으로 나눈 지난 일정 색인.
+
+    버킷 안은 시각 순으로 정렬되어 있어 구간 조회 비용이 전체 기록이 아니라 결과 수에 비례한다.
+    메모리에 올리지 않는 SQLite 저장소는 ts 인덱스 조회에 그대로 맡긴다.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.in_memory = getattr(store, "cached", True)
+        self.months = []  # 정렬된 월 목록
+        self.buckets = {}  # 월 -> [(timestamp, 순번, 일정)] (정렬)
+        self.counter = itertools.count()
+        if self.in_memory:
+            for item in store.items:
+                self._insert(item)
+
+    def _insert(self, item):
+        month = month_of(item.timestamp)
+        bucket = self.buckets.get(month)
+        if bucket is None:
+            bucket = self.buckets[month] = []
+            bisect.insort(self.months, month)
+        bisect.insort(bucket, (item.timestamp, next(self.counter), item))
+
+    def __len__(self):
+        return len(self.store)
+
+    def extend(self, items):
+        self.store.extend(items)
+        if self.in_memory:
+            for item in items:
+                self._insert(item)
+
+    def clear(self):
+        self.store.clear()
+        self.months.clear()
+        self.buckets.clear()
+
+    def _ranges(self, start_ts, end_ts):
+        """구간에 걸친 (버킷, 시작 위치, 끝 위치) 목록."""
+        ranges = []
+        last_month = month_of(end_ts)
+        position = bisect.bisect_left(self.months, month_of(start_ts))
+        while position < len(self.months) and self.months[position] <= last_month:
+            bucket = self.buckets[self.months[position]]
+            ranges.append((bucket, bisect.bisect_left(bucket, (start_ts,)), bisect.bisect_left(bucket, (end_ts,))))
+            position += 1
+        return ranges
+
+    def description_lengths(self, start_ts, end_ts):
+        """구간 안 지난 일정들의 설명 길이 (시각 순). 페이지 경계를 정하는 데 사용."""
+        if not self.in_memory:
+            return self.store.description_lengths(start_ts, end_ts)
+        return [
+            len(entry[2].description) for bucket, low, high in self._ranges(start_ts, end_ts) for entry in bucket[low:high]
+        ]
+
+    def between(self, start_ts, end_ts, offset=0, limit=None):
+        """start_ts 이상 end_ts 미만인 지난 일정 (시각 순). offset·limit로 한 페이지만 꺼낼 수 있음."""
+        if not self.in_memory:
+            return self.store.between(start_ts, end_ts, offset, limit)
+
+        result = []
+        for bucket, low, high in self._ranges(start_ts, end_ts):
+            if offset >= high - low:
+                offset -= high - low
+                continue
+            low += offset
+            offset = 0
+            if limit is not None:
+                high = min(high, low + limit - len(result))
+            result.extend(entry[2] for entry in bucket[low:high])
+            if limit is not None and len(result) >= limit:
+                break
+        return result
+
+def next_midnight_timestamp():
+    """다음 자정(KST)의 epoch 초."""
+    tomorrow = datetime.now(KST).date() + timedelta(days=1)
+    return KST.localize(datetime(tomorrow.year, tomorrow.month, tomorrow.day)).timestamp()
+
+class RenderCache:
+    """/list, /history 응답 문구 캐시.
+
+    일정·지난 일정·mute가 바뀌면 invalidate()로 비우고, 날짜 표시 형식이 바뀌는 자정에는 저절로 만료된다.
+    """
+
+    MAX_ENTRIES = 64
+
+    def __init__(self):
+        self.entries = {}  # 키 -> (만료 시각, 문구)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None and time.time() < entry[0]:
+            return entry[1]
+        return None
+
+    def put(self, key, text, expires_at=float("inf")):
+        if len(self.entries) >= self.MAX_ENTRIES:
+            self.entries.clear()
+        self.entries[key] = (min(expires_at, next_midnight_timestamp()), text)
+
+    def invalidate(self):
+        self.entries.clear()
+
+class TokenBucket:
+    """초당 rate개의 토큰이 채워지는 토큰 버킷 (전체 전송 속도 제한)."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """RetryAfter 응답을 받으면 지정된 시간 동안 모든 전송을 멈춤."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0
+        self.updated = self.blocked_until  # 멈춘 동안은 토큰이 채워지지 않고, 재개 후 rate대로 다시 채워짐
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# 다른 프로세스가 보낸 실패 내역을 다시 예외로 바꿀 때 쓰는 오류 종류
+REMOTE_ERROR_TYPES = {cls.__name__: cls for cls in (Forbidden, BadRequest, NetworkError, TimedOut)}
+
+class BroadcastResult:
+    """브로드캐스트 한 건의 결과 보고서."""
+
+    def __init__(self, total):
+        self.total = total
+        self.delivered = []
+        self.migrated = {}  # 기존 chat_id -> 새 chat_id
+        self.failed = {}  # chat_id -> 예외
+        self.retries = 0
+        self.elapsed = 0.0
+
+    @property
+    def done(self):
+        """전송을 마친(성공 또는 실패) 대상 수."""
+        return len(self.delivered) + len(self.failed)
+
+    def error_counts(self):
+        """실패 건수를 오류 종류별로 집계 (예: {"Forbidden": 3})."""
+        counts = {}
+        for error in self.failed.values():
+            name = type(error).__name__
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def to_dict(self):
+        """다른 프로세스로 넘길 수 있는 형태로 변환 (예외는 (종류, 메시지)로)."""
+        return {
+            "total": self.total,
+            "delivered": self.delivered,
+            "migrated": self.migrated,
+            "failed": {chat_id: (type(error).__name__, str(error)) for chat_id, error in self.failed.items()},
+            "retries": self.retries,
+        }
+
+    def merge(self, data):
+        """다른 프로세스가 보낸 to_dict() 결과를 합침. 대상 수(total)는 호출한 쪽에서 관리."""
+        self.delivered.extend(data["delivered"])
+        self.migrated.update({int(old): new for old, new in data["migrated"].items()})
+        self.failed.update({
+            int(chat_id): REMOTE_ERROR_TYPES.get(name, TelegramError)(message)
+            for chat_id, (name, message) in data["failed"].items()
+        })
+        self.retries += data["retries"]
+
+    def summary(self):
+        return (
+            f"전체 {self.total}건, 성공 {len(self.delivered)}건, 실패 {len(self.failed)}건, "
+            f"chat_id 변경 {len(self.migrated)}건, 재시도 {self.retries}회, 소요 {self.elapsed:.1f}초"
+        )
+
+class Broadcaster:
+    """동시 전송 수와 전송 속도를 제한하며 여러 채팅방에 메시지를 보내는 전송기.
+
+    텔레그램의 전송 제한은 봇마다 따로 적용되므로 속도 제한과 채팅방별 간격도 봇 토큰별로 관리한다.
+    processes를 지정하면 대상이 DELIVERY_POOL_MIN 이상인 브로드캐스트는 작업자 프로세스들이 나눠 보낸다.
+    """
+
+    def __init__(self, concurrency=BROADCAST_CONCURRENCY, rate=GLOBAL_RATE_LIMIT, max_retries=BROADCAST_MAX_RETRIES, processes=0):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.rate = rate
+        self.processes = processes
+        self.pool = None  # 처음 쓸 때 만드는 ProcessPoolExecutor
+        self.buckets = {}  # 봇 토큰 -> TokenBucket
+        self.next_allowed = {}  # (봇 토큰, chat_id) -> 다음 전송 가능 시각(monotonic)
+
+    def bucket(self, bot):
+        bucket = self.buckets.get(bot.token)
+        if bucket is None:
+            bucket = self.buckets[bot.token] = TokenBucket(self.rate)
+        return bucket
+
+    async def _wait_chat_turn(self, bot, chat_id):
+        """같은 채팅방으로의 연속 전송 간격을 보장."""
+        interval = GROUP_CHAT_INTERVAL if chat_id < 0 else PRIVATE_CHAT_INTERVAL
+        key = (bot.token, chat_id)
+        now = time.monotonic()
+        ready_at = self.next_allowed.get(key, now)
+        self.next_allowed[key] = max(now, ready_at) + interval
+        if ready_at > now:
+            await asyncio.sleep(ready_at - now)
+
+    async def _send(self, bot, chat_id, text, result, on_delivered, kwargs):
+        target = chat_id
+        bucket = self.bucket(bot)
+        for attempt in range(self.max_retries + 1):
+            await self._wait_chat_turn(bot, target)
+            await bucket.acquire()
+            try:
+                await bot.send_message(chat_id=target, text=text, **kwargs)
+                result.delivered.append(target)
+                if on_delivered is not None:
+                    on_delivered(target)
+                return
+            except RetryAfter as e:
+                # 텔레그램이 요구한 시간만큼 전체 전송을 멈춘 뒤 재시도
+                bucket.pause(e.retry_after)
+                error = e
+            except ChatMigrated as e:
+                # 그룹이 슈퍼그룹으로 바뀐 경우 새 chat_id로 재전송
+                result.migrated[chat_id] = e.new_chat_id
+                target = e.new_chat_id
+                error = e
+            except BadRequest as e:
+                result.failed[chat_id] = e
+                return
+            except NetworkError as e:
+                # 일시적인 네트워크 오류는 지수 백오프 후 재시도
+                await asyncio.sleep(2 ** attempt)
+                error = e
+            except Exception as e:
+                result.failed[chat_id] = e
+                return
+            result.retries += 1
+        result.failed[chat_id] = error
+
+    async def broadcast(self, bot, chat_ids, text, on_delivered=None, kind="broadcast", result=None, **kwargs):
+        """chat_ids 전체에 text를 전송하고 BroadcastResult를 반환.
+
+        on_delivered는 전송에 성공할 때마다 chat_id로 호출하고, kind는 지표에 기록할 브로드캐스트 종류.
+        진행 상황을 중간에 보려면 미리 만든 BroadcastResult를 result로 넘긴다.
+        """
+        chat_ids = list(chat_ids)  # 전송 중 목록이 바뀌어도 안전하도록 복사본 사용
+        if result is None:
+            result = BroadcastResult(len(chat_ids))
+        started = time.monotonic()
+
+        if self.processes and len(chat_ids) >= DELIVERY_POOL_MIN:
+            await self._broadcast_in_pool(bot, chat_ids, text, result, on_delivered, kwargs)
+        else:
+            pending = iter(chat_ids)
+
+            async def worker():
+                for chat_id in pending:
+                    await self._send(bot, chat_id, text, result, on_delivered, kwargs)
+
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(chat_ids)))))
+
+        # 간격 제한이 끝난 채팅방 정보 정리
+        now = time.monotonic()
+        self.next_allowed = {key: t for key, t in self.next_allowed.items() if t > now}
+
+        result.elapsed = time.monotonic() - started
+        metrics.record_broadcast(kind, result)
+        return result
+
+    async def _broadcast_in_pool(self, bot, chat_ids, text, result, on_delivered, kwargs):
+        """chat_ids를 DELIVERY_CHUNK_SIZE씩 나눠 작업자 프로세스에서 보내고, 묶음이 끝날 때마다 결과를 합침.
+
+        작업자마다 HTTP 연결과 속도 제한을 따로 두며, 봇의 전송 한도(rate)는 작업자 수만큼 나눠 준다.
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"), initializer=setup_logging
+            )
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(
+                self.pool, deliver_chunk, bot.token, chat_ids[i:i + DELIVERY_CHUNK_SIZE], text, kwargs,
+                self.rate / self.processes, self.concurrency,
+            )
+            for i in range(0, len(chat_ids), DELIVERY_CHUNK_SIZE)
+        ]
+        try:
+            for future in asyncio.as_completed(futures):
+                data = await future
+                result.merge(data)
+                if on_delivered is not None:
+                    for chat_id in data["delivered"]:
+                        on_delivered(chat_id)
+        except BaseException:
+            # 취소되거나 작업자가 실패하면 아직 시작하지 않은 묶음은 보내지 않음
+            for future in futures:
+                future.cancel()
+            raise
+
+    def close(self):
+        """작업자 프로세스 종료."""
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+def make_request(pool_size, http_version=HTTP_VERSION):
+    """Bot API 요청 객체. 연결을 keep-alive로 재사용하고, 풀이 차면 HTTP_POOL_TIMEOUT까지 기다림."""
+    if http_version != "1.1" and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2용 h2 패키지가 없어 HTTP/1.1을 사용합니다. (pip install \"python-telegram-bot[http2]\")")
+        http_version = "1.1"
+    return HTTPXRequest(
+        connection_pool_size=pool_size,
+        connect_timeout=HTTP_CONNECT_TIMEOUT,
+        read_timeout=HTTP_READ_TIMEOUT,
+        write_timeout=HTTP_WRITE_TIMEOUT,
+        pool_timeout=HTTP_POOL_TIMEOUT,
+        http_version=http_version,
+        httpx_kwargs={
+            "limits": httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+            ),
+        },
+    )
+
+def make_bot(token, pool_size=BROADCAST_CONCURRENCY):
+    """Application 없이 전송에만 쓰는 Bot. 동시 전송 수만큼 HTTP 연결을 열어 둠 (PTB 기본값은 연결 1개)."""
+    return Bot(token, base_url=BOT_API_URL, request=make_request(pool_size))
+
+# 작업자 프로세스 안에서만 쓰는 상태 (프로세스마다 이벤트 루프, 봇(HTTP 연결), 브로드캐스터를 하나씩 둠)
+_worker_loop = None
+_worker_bots = {}  # 봇 토큰 -> 초기화된 Bot
+_worker_broadcaster = None
+
+def deliver_chunk(token, chat_ids, text, kwargs, rate, concurrency):
+    """작업자 프로세스에서 chat_ids에 전송하고 BroadcastResult.to_dict() 결과를 반환."""
+    global _worker_loop, _worker_broadcaster
+    if _worker_loop is None:
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+        _worker_broadcaster = Broadcaster(concurrency=concurrency, rate=rate)
+    return _worker_loop.run_until_complete(_deliver_chunk(token, chat_ids, text, kwargs))
+
+async def _deliver_chunk(token, chat_ids, text, kwargs):
+    bot = _worker_bots.get(token)
+    if bot is None:
+        bot = make_bot(token, _worker_broadcaster.concurrency)
+        await bot.initialize()
+        _worker_bots[token] = bot
+    result = await _worker_broadcaster.broadcast(bot, chat_ids, text, kind="pool_chunk", **kwargs)
+    return result.to_dict()
+
+# 모든 전송 경로가 공유하는 브로드캐스터 (속도 제한을 함께 적용)
+broadcaster = Broadcaster(processes=DELIVERY_PROCESSES)
+
+async def broadcast_with_progress(bot, chat_ids, text, progress_message, label, kind):
+    """브로드캐스트하면서 progress_message를 BROADCAST_PROGRESS_INTERVAL마다 진행 상황으로 고침."""
+    chat_ids = list(chat_ids)
+    result = BroadcastResult(len(chat_ids))
+
+    async def report():
+        while True:
+            await asyncio.sleep(BROADCAST_PROGRESS_INTERVAL)
+            try:
+                await progress_message.edit_text(f"📤 {label} 전송 중... ({result.done}/{result.total})")
+            except Exception as e:
+                logger.debug("진행 상황 메시지 수정 실패: %s", e)  # 진행 표시는 실패해도 전송에 영향 없음
 
-# 글로벌 변수 초기화
-notified_schedules_hour = set()
-notified_schedules_day = set()
-notified_schedules_week = set()
-global_schedule = load_data(DATA_FILE)
-past_schedule = load_data(HISTORY_FILE)
+    reporter = asyncio.create_task(report())
+    try:
+        return await broadcaster.broadcast(bot, chat_ids, text, kind=kind, result=result)
+    finally:
+        reporter.cancel()
+
+# 다시 보내도 성공할 수 없는 채팅방을 뜻하는 BadRequest 메시지
+DEAD_CHAT_MESSAGES = ("chat not found", "user is deactivated", "group chat was deactivated", "peer_id_invalid")
+
+def is_dead_chat_error(error):
+    """봇 차단·탈퇴·삭제된 채팅방처럼 구독자 목록에서 빼야 하는 오류인지 판별."""
+    if isinstance(error, Forbidden):
+        return True
+    if isinstance(error, BadRequest):
+        message = error.message.lower()
+        return any(text in message for text in DEAD_CHAT_MESSAGES)
+    return False
+
+class SubscriberRegistry:
+    """알림을 받는 chat_id 목록.
+
+    브로드캐스트 결과를 받아 바뀐 chat_id를 갱신하고 더 이상 전송할 수 없는 채팅방을 뺀다.
+    변경 사항은 모아 두었다가 schedule_flush()로 예약된 저장에서 한 번에 기록하므로,
+    /start가 몰려도 파일은 FLUSH_INTERVAL마다 한 번만 다시 쓴다. 종료 시에는 flush()로 바로 저장한다.
+    """
+
+    FLUSH_INTERVAL = USER_ID_FLUSH_INTERVAL
+
+    def __init__(self):
+        self.user_ids = load_user_ids()
+        self.added = set()  # 마지막 저장 이후 추가된 chat_id
+        self.removed = set()  # 마지막 저장 이후 삭제된 chat_id
+        self.flush_task = None
+
+    @property
+    def dirty(self):
+        return bool(self.added or self.removed)
+
+    def _add(self, chat_id):
+        self.user_ids.add(chat_id)
+        self.removed.discard(chat_id)
+        self.added.add(chat_id)
+
+    def _discard(self, chat_id):
+        self.user_ids.discard(chat_id)
+        self.added.discard(chat_id)
+        self.removed.add(chat_id)
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def __iter__(self):
+        return iter(self.user_ids)
+
+    def __contains__(self, chat_id):
+        return chat_id in self.user_ids
+
+    def add(self, chat_id):
+        """새 구독자면 추가하고 True 반환."""
+        if chat_id in self.user_ids:
+            return False
+        self._add(chat_id)
+        return True
+
+    def apply(self, result):
+        """BroadcastResult를 반영. (chat_id 변경 수, 삭제된 chat_id 목록) 반환."""
+        migrated = 0
+        for old_chat_id, new_chat_id in result.migrated.items():
+            if old_chat_id in self.user_ids:
+                self._discard(old_chat_id)
+                self._add(new_chat_id)
+                migrated += 1
+        removed = [
+            chat_id for chat_id, error in result.failed.items()
+            if is_dead_chat_error(error) and result.migrated.get(chat_id, chat_id) in self.user_ids
+        ]
+        for chat_id in removed:
+            self._discard(result.migrated.get(chat_id, chat_id))
+        return migrated, removed
 
-# 프로그램 시작 시 mute 상태 불러오기
-mute_schedules = load_mute_schedules()
+    def flush(self):
+        """변경 사항이 있을 때만 바로 저장."""
+        if not self.dirty:
+            return
+        added, removed = self.added, self.removed
+        self.added, self.removed = set(), set()
+        try:
+            save_user_ids(self.user_ids, added, removed)
+        except Exception:
+            # 저장에 실패하면 다음 저장 때 다시 시도
+            self.added |= added - self.removed
+            self.removed |= removed - self.added
+            raise
+
+    def schedule_flush(self):
+        """FLUSH_INTERVAL 뒤에 한 번 저장하도록 예약 (이미 예약되어 있으면 그 저장에 합침)."""
+        if not self.dirty or (self.flush_task is not None and not self.flush_task.done()):
+            return
+        self.flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.FLUSH_INTERVAL)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error("사용자 목록 저장 실패: %s", e)
+            self.flush_task = None
+            self.schedule_flush()
+
+class ReminderScheduler:
+    """일정별 알림 시각을 힙에 보관하고 다음 알림 시각까지만 대기하는 스케줄러.
+
+    모든 테넌트가 힙 하나를 함께 쓰며, 일정은 (테넌트 이름, id(일정))로 구분한다.
+    시각·내용이 같은 일정은 ID가 같으므로, 하나를 지우거나 고쳐도 다른 하나의 알림은 남도록 객체 단위로 관리한다.
+    add, remove, reload는 현재 테넌트(tenant())의 일정에 적용된다.
+    """
+
+    def __init__(self):
+        self.heap = []  # (알림 시각 timestamp, 세대 번호, (테넌트 이름, id(일정)), 알림 종류)
+        self.events = {}  # (테넌트 이름, id(일정)) -> (일정, 세대 번호, 테넌트)
+        self.generation = itertools.count()
+        self.wakeup = asyncio.Event()
+
+    def add(self, event):
+        """일정의 알림 작업을 만들고 끝나지 않은 알림 시각을 힙에 등록."""
+        self._push(tenant().reminder_jobs.schedule([event], time.time()))
+        self._compact()
+        self.wakeup.set()
+
+    def _push(self, waiting):
+        owner = tenant()
+        generations = {}
+        for event, kind, fire_ts in waiting:
+            key = (owner.name, id(event))
+            if key not in generations:
+                generations[key] = next(self.generation)
+                self.events[key] = (event, generations[key], owner)
+            heapq.heappush(self.heap, (fire_ts, generations[key], key, kind))
+
+    def remove(self, event):
+        """일정의 알림 취소 (힙 항목은 꺼낼 때 무시)."""
+        self.events.pop((tenant().name, id(event)), None)
+
+    def reload(self, events):
+        """현재 테넌트의 알림을 작업 큐 기준으로 다시 예약 (시작 시 재시작 전 대기·발송 중 작업 복구)."""
+        owner = tenant()
+        self.events = {key: value for key, value in self.events.items() if key[0] != owner.name}
+        owner.reminder_jobs.retain({event.id for event in events})
+        self._push(owner.reminder_jobs.schedule(events, time.time(), new=False))
+        self._compact()
+        self.wakeup.set()
+
+    def clear(self):
+        """모든 테넌트의 알림 예약을 비움 (클러스터 모드에서 리더 자리를 잃었을 때)."""
+        self.heap = []
+        self.events = {}
+        self.wakeup.set()
+
+    def _is_live(self, entry):
+        current = self.events.get(entry[2])
+        return current is not None and current[1] == entry[1]
+
+    def _compact(self):
+        """취소된 항목이 쌓이면 힙을 다시 구성."""
+        if len(self.heap) > 2 * len(REMINDER_OFFSETS) * len(self.events) + 64:
+            self.heap = [entry for entry in self.heap if self._is_live(entry)]
+            heapq.heapify(self.heap)
+
+    def next_due(self):
+        """다음 알림 시각(timestamp). 예약된 알림이 없으면 None."""
+        while self.heap and not self._is_live(self.heap[0]):
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now_ts):
+        """알림 시각이 지난 (테넌트, 일정, 알림 종류, 알림 시각) 목록을 꺼냄. 루프가 늦어져도 건너뛰지 않음."""
+        due = []
+        while self.heap and self.heap[0][0] <= now_ts:
+            entry = heapq.heappop(self.heap)
+            if self._is_live(entry):
+                event, generation, owner = self.events[entry[2]]
+                due.append((owner, event, entry[3], entry[0]))
+        return due
+
+    async def wait(self):
+        """다음 알림 시각이 되거나 일정이 바뀔 때까지 대기."""
+        self.wakeup.clear()
+        next_due = self.next_due()
+        timeout = REMINDER_MAX_SLEEP if next_due is None else min(REMINDER_MAX_SLEEP, next_due - time.time())
+        if timeout <= 0:
+            return
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+class ReminderJobQueue:
+    """알림 발송 작업을 (일정 ID, 알림 종류) 단위로 영구 저장하는 작업 큐.
+
+    작업은 대기 -> in_flight(발송 중) -> done(완료) 순서로 바뀐다. 대기 작업은 저장하지 않고 일정 시각에서 계산하며,
+    발송을 시작했거나 건너뛰기로 정한 작업만 기록한다. 따라서 저장량은 일정 수가 아니라 발송·편집 횟수에 비례한다.
+    발송 중에는 전송을 마친 chat_id를 기록해 두므로, 발송 도중 재시작되면 남은 대상에게만 이어서 보낸다.
+    봇이 꺼져 있는 동안 알림 구간이 지난 대기 작업은 REMINDER_CATCHUP 정책에 따라 보내거나 건너뛴다.
+    JSON 저장소는 JournaledList처럼 스냅샷과 추가 전용 저널로 기록한다.
+    """
+
+    IN_FLIGHT, DONE = "in_flight", "done"
+    PENDING = "pending"  # 이전 버전이 모든 대기 작업을 미리 저장하던 형식
+    FORMAT_VERSION = 2  # 발송 중·완료 작업만 저장하는 스냅샷 형식 ({"version": 2, "jobs": [...]})
+    CHECKPOINT_INTERVAL = 1.0  # 발송 중 진행 상황을 저장하는 최소 간격(초)
+
+    def __init__(self, file_path, database=None):
+        self.file_path = file_path
+        self.journal_path = file_path + ".journal"
+        self.database = database
+        self.jobs = None  # (일정 ID, 알림 종류) -> 작업 dict (발송 중·완료 작업만)
+        self.legacy_pending = None  # 이전 형식에서 불러온 경우 그 형식의 대기 작업 키 (첫 reload 때만 사용)
+        self.unsaved = {}  # 작업 키 -> 아직 기록하지 않은 전송 완료 chat_id 목록
+        self.journal_size = 0
+        self.checkpointed_at = 0.0
+        self.recovered_at = 0.0  # 마지막 reload 시각. 이때 이미 알림 구간이 지난 작업만 catch-up 정책을 적용
+
+    def _load(self):
+        if self.jobs is not None:
+            return self.jobs
+        self.jobs = {}
+        rows = []
+        if self.database is not None:
+            rows = [
+                {"schedule_id": schedule_id, "kind": kind, "fire_ts": fire_ts, "state": state, "delivered": json.loads(delivered)}
+                for schedule_id, kind, fire_ts, state, delivered in self.database.execute(
+                    "SELECT schedule_id, kind, fire_ts, state, delivered FROM reminder_jobs"
+                )
+            ]
+            self._import(rows, legacy=any(row["state"] == self.PENDING for row in rows))
+            if self.legacy_pending:
+                with self.database:
+                    self.database.execute("DELETE FROM reminder_jobs WHERE state = ?", (self.PENDING,))
+            return self.jobs
+
+        try:
+            with open(self.file_path, "rb") as file:
+                content = file.read()
+            rows = json.loads(content)
+        except FileNotFoundError:
+            content = None
+        # 버전 표시가 있으면 이 형식의 스냅샷 (저널이 없거나 맞지 않아도 압축 도중 종료된 것일 뿐 이전 형식이 아님)
+        versioned = isinstance(rows, dict) and rows.get("version") == self.FORMAT_VERSION
+        if versioned:
+            rows = rows["jobs"]
+
+        replayed = 0
+        valid_journal = False
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as file:
+                lines = file.read().splitlines()
+            if lines and json.loads(lines[0]).get("base") == zlib.crc32(content or b""):
+                valid_journal = True
+        except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+            lines = []
+
+        if content is None and not valid_journal:
+            # 이전 버전의 발송 기록([일정 ID, 알림 종류 번호])은 완료된 작업으로 가져옴
+            rows = [
+                {"schedule_id": schedule_id, "kind": REMINDER_OFFSETS[offset][0], "fire_ts": 0, "state": self.DONE, "delivered": []}
+                for schedule_id, offset in load_data(os.path.join(os.path.dirname(self.file_path), NOTIFIED_FILE))
+            ]
+            self._import(rows, legacy=bool(rows))
+        else:
+            # 버전 표시 없는 스냅샷만 있으면 대기 작업까지 모두 저장하던 이전 버전의 파일
+            self._import(rows, legacy=not versioned and not valid_journal)
+
+        if valid_journal:
+            for line in lines[1:]:
+                try:
+                    op = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # 기록 도중 종료된 마지막 줄은 무시
+                self._apply(op)
+                replayed += 1
+        if replayed or not valid_journal:
+            self.compact()
+        return self.jobs
+
+    def _import(self, rows, legacy):
+        """저장된 행을 불러옴. 이전 형식의 대기 작업은 저장하지 않고 키만 기억해 첫 reload에서 대기로 취급."""
+        if legacy:
+            self.legacy_pending = set()
+        for row in rows:
+            key = (row["schedule_id"], row["kind"])
+            if row["state"] == self.PENDING:
+                self.legacy_pending.add(key)
+            else:
+                self.jobs[key] = {"fire_ts": row["fire_ts"], "state": row["state"], "delivered": row["delivered"]}
+
+    def _apply(self, op):
+        """저널 기록 하나를 메모리의 작업 목록에 적용."""
+        if op[0] == "set":
+            for schedule_id, kind, fire_ts, state in op[1]:
+                job = self.jobs.setdefault((schedule_id, kind), {"fire_ts": fire_ts, "state": state, "delivered": []})
+                job["fire_ts"] = fire_ts
+                job["state"] = state
+                if state == self.DONE:
+                    job["delivered"] = []
+        elif op[0] == "delivered":
+            job = self.jobs.get((op[1], op[2]))
+            if job is not None:
+                job["delivered"].extend(op[3])
+        elif op[0] == "remove":
+            for schedule_id, kind in op[1]:
+                self.jobs.pop((schedule_id, kind), None)
+
+    def _persist(self, op):
+        """변경 하나를 기록. SQLite는 해당 행만 갱신하고 JSON은 저널에 한 줄 추가."""
+        if self.database is not None:
+            with self.database:
+                if op[0] == "set":
+                    self.database.executemany(
+                        "INSERT OR REPLACE INTO reminder_jobs (schedule_id, kind, fire_ts, state, delivered) VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (schedule_id, kind, fire_ts, state, json.dumps(self.jobs[(schedule_id, kind)]["delivered"]))
+                            for schedule_id, kind, fire_ts, state in op[1]
+                        ],
+                    )
+                elif op[0] == "delivered":
+                    self.database.execute(
+                        "UPDATE reminder_jobs SET delivered = ? WHERE schedule_id = ? AND kind = ?",
+                        (json.dumps(self.jobs[(op[1], op[2])]["delivered"]), op[1], op[2]),
+                    )
+                elif op[0] == "remove":
+                    self.database.executemany("DELETE FROM reminder_jobs WHERE schedule_id = ? AND kind = ?", op[1])
+            return
+        with open(self.journal_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(op, ensure_ascii=False) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self.journal_size += 1
+        if self.journal_size >= JOURNAL_COMPACT_THRESHOLD:
+            self.compact()
+
+    def _record(self, op):
+        self._apply(op)
+        self._persist(op)
+
+    def compact(self):
+        """현재 작업 목록을 스냅샷으로 저장하고 저널을 비움 (JSON 저장소만)."""
+        if self.database is not None:
+            return
+        self.unsaved.clear()  # 메모리의 전송 기록이 스냅샷에 함께 저장됨
+        content = save_data(self.file_path, {"version": self.FORMAT_VERSION, "jobs": [
+            {"schedule_id": schedule_id, "kind": kind, **job} for (schedule_id, kind), job in self.jobs.items()
+        ]}, indent=None)
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(json.dumps({"base": zlib.crc32(content)}) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.journal_path)
+        self.journal_size = 0
+
+    def schedule(self, events, now_ts, new=True):
+        """끝나지 않은 (일정, 알림 종류, 알림 시각) 목록을 반환.
+
+        new이면 새로 추가·수정된 일정이므로 알림 구간이 이미 지난 알림은 완료로 기록해 보내지 않는다.
+        재시작 후 reload(new=False)에서는 기록이 없는 알림을 모두 대기로 보고, 늦었는지는 claim()에서 정책으로 판단한다.
+        """
+        jobs = self._load()
+        skipped = []
+        waiting = []
+        for event in events:
+            for kind, offset, label, window in REMINDER_OFFSETS:
+                key = (event.id, kind)
+                fire_ts = event.timestamp - offset.total_seconds()
+                job = jobs.get(key)
+                if job is None:
+                    passed = fire_ts + window.total_seconds() <= now_ts
+                    if passed and (new or (self.legacy_pending is not None and key not in self.legacy_pending)):
+                        skipped.append([event.id, kind, fire_ts, self.DONE])
+                        continue
+                    waiting.append((event, kind, fire_ts))
+                elif job["state"] != self.DONE:
+                    waiting.append((event, kind, job["fire_ts"]))
+        if skipped:
+            self._record(["set", skipped])
+        if not new:
+            self.legacy_pending = None
+            self.recovered_at = now_ts
+        return waiting
+
+    def _should_catch_up(self, event, kind, fire_ts, now_ts):
+        """재시작 전에 알림 구간이 지난 대기 작업을 지금 보낼지 REMINDER_CATCHUP 정책으로 판단."""
+        if REMINDER_CATCHUP == "all":
+            return True
+        if REMINDER_CATCHUP == "latest":
+            # 같은 일정에 더 최근에 시각이 된 알림이 있으면 그 알림만 보냄
+            return not any(
+                other != kind and fire_ts < event.timestamp - offset.total_seconds() <= now_ts
+                for other, offset, label, window in REMINDER_OFFSETS
+            )
+        return False
+
+    def claim(self, event, kind, now_ts):
+        """보낼 작업이면 발송 중으로 표시하고 이미 전송한 chat_id 집합을 반환. 보내지 않을 작업이면 None."""
+        key = (event.id, kind)
+        job = self._load().get(key)
+        if job is not None:
+            return None if job["state"] == self.DONE else set(job["delivered"])
+        offset, window = next((offset, window) for name, offset, label, window in REMINDER_OFFSETS if name == kind)
+        fire_ts = event.timestamp - offset.total_seconds()
+        # 봇이 꺼져 있는 동안 놓친 작업만 정책을 적용하고, 실행 중에 시각이 된 알림은 늦어져도 보냄
+        recovered = fire_ts + window.total_seconds() < self.recovered_at
+        if recovered and not self._should_catch_up(event, kind, fire_ts, now_ts):
+            self._record(["set", [[event.id, kind, fire_ts, self.DONE]]])
+            return None
+        self._record(["set", [[event.id, kind, fire_ts, self.IN_FLIGHT]]])
+        self.checkpointed_at = time.monotonic()
+        return set()
+
+    def checkpoint(self, key, chat_id):
+        """발송 중인 작업에 전송을 마친 chat_id를 기록 (CHECKPOINT_INTERVAL마다 새로 보낸 대상만 저장)."""
+        job = self._load().get(key)
+        if job is None:
+            return
+        job["delivered"].append(chat_id)
+        self.unsaved.setdefault(key, []).append(chat_id)
+        now = time.monotonic()
+        if now - self.checkpointed_at >= self.CHECKPOINT_INTERVAL:
+            self.checkpointed_at = now
+            self.save_progress(key)
+
+    def save_progress(self, key):
+        chat_ids = self.unsaved.pop(key, None)
+        if chat_ids and key in self._load():
+            self._persist(["delivered", key[0], key[1], chat_ids])
+
+    def complete(self, key, event=None):
+        """작업을 완료로 기록. 아직 claim하지 않은 작업(예: mute로 건너뛴 알림)은 event로 알림 시각을 계산."""
+        self.unsaved.pop(key, None)
+        job = self._load().get(key)
+        if job is not None:
+            fire_ts = job["fire_ts"]
+        elif event is not None:
+            fire_ts = event.timestamp - next(offset for name, offset, label, window in REMINDER_OFFSETS if name == key[1]).total_seconds()
+        else:
+            return
+        if job is None or job["state"] != self.DONE:
+            self._record(["set", [[key[0], key[1], fire_ts, self.DONE]]])
+
+    def _remove(self, keys):
+        if keys:
+            for key in keys:
+                self.unsaved.pop(key, None)
+            self._record(["remove", [list(key) for key in keys]])
+
+    def retain(self, schedule_ids):
+        """schedule_ids에 없는 (지난·삭제된) 일정의 작업을 정리."""
+        self._remove([key for key in self._load() if key[0] not in schedule_ids])
+
+    def discard(self, schedule_ids):
+        """지정한 (지난·삭제·수정된) 일정의 작업만 정리 (전체 일정 수와 무관)."""
+        jobs = self._load()
+        self._remove([
+            (schedule_id, name)
+            for schedule_id in schedule_ids
+            for name, offset, label, window in REMINDER_OFFSETS
+            if (schedule_id, name) in jobs
+        ])
+
+# 모든 테넌트가 함께 쓰는 알림 스케줄러
+reminder_scheduler = ReminderScheduler()
+
+# 가장 이른 일정이 바뀌었을 때(추가·수정) 지난 일정 정리 루프를 깨우는 이벤트
+expiry_wakeup = asyncio.Event()
+
+class Tenant:
+    """봇 하나(지부 하나)의 상태와 저장소.
+
+    파일과 데이터베이스는 data_dir 아래에 봇마다 따로 두고, 알림 스케줄러와 브로드캐스터는 모든 테넌트가 함께 쓴다.
+    """
+
+    def __init__(self, name, token, data_dir=".", admin_password=ADMIN_PASSWORD, load=True, display_name=BOT_DISPLAY_NAME):
+        self.name = name
+        self.token = token
+        self.data_dir = data_dir
+        self.admin_password = admin_password
+        self.display_name = display_name
+        self.application = None
+        os.makedirs(data_dir, exist_ok=True)
+        self.database = open_database(self.path(DB_FILE)) if STORAGE_BACKEND == "sqlite" else None
+        if load:
+            self.load()
+
+    def load(self):
+        """저장소에서 일정·구독자·관리자 등을 불러오고 알림을 예약.
+
+        클러스터 모드의 작업자는 저장소만 읽으므로 load=False로 만들고, 리더가 된 뒤에 불러온다.
+        """
+        with use_tenant(self):
+            self.admin_registry = AdminRegistry()
+            self.subscribers = SubscriberRegistry()
+            self.reminder_jobs = ReminderJobQueue(self.path(REMINDER_JOB_FILE), self.database)
+            if self.database is not None:
+                schedule_store = SqliteList(self.database, "schedules")
+                history_store = SqliteList(self.database, "history", cached=False)  # 지난 일정은 필요한 구간만 조회
+            else:
+                schedule_store = JournaledList(self.path(DATA_FILE))
+                history_store = JournaledList(self.path(HISTORY_FILE))
+            self.schedule_index = ScheduleIndex(schedule_store)
+            self.history_index = HistoryIndex(history_store)
+            self.render_cache = RenderCache()
+
+            # 프로그램 시작 시 mute 상태 불러오기
+            self.mute_schedules = load_mute_schedules()
+
+            # 불러온 일정의 알림 시각 예약
+            reminder_scheduler.reload(self.schedule_index.items)
+
+    def path(self, file_name):
+        return os.path.join(self.data_dir, file_name)
+
+def load_tenant_configs():
+    """TENANTS_FILE에 적힌 봇 설정 목록. 파일이 없으면 현재 디렉터리의 데이터를 쓰는 봇 하나."""
+    configs = load_data(TENANTS_FILE)
+    if not configs:
+        configs = [{"name": "default", "token": "TOKEN", "data_dir": "."}]     #TOKEN 지우고 토큰 번호 입력
+    for config in configs:
+        config.setdefault("data_dir", config["name"])
+        config.setdefault("admin_password", ADMIN_PASSWORD)
+        config.setdefault("display_name", BOT_DISPLAY_NAME)
+    return configs
+
+def load_tenants(load=True):
+    return [
+        Tenant(config["name"], config["token"], config["data_dir"], config["admin_password"], load, config["display_name"])
+        for config in load_tenant_configs()
+    ]
+
+tenants = []  # 실행 중인 모든 테넌트 (main에서 채움)
+
+metrics.gauge("bot_tenants", "실행 중인 봇(테넌트) 수", lambda: len(tenants))
+metrics.gauge("bot_schedules", "예정 일정 수 (모든 테넌트 합계)", lambda: sum(len(t.schedule_index) for t in tenants))
+metrics.gauge("bot_history", "지난 일정 수 (모든 테넌트 합계)", lambda: sum(len(t.history_index) for t in tenants))
+metrics.gauge("bot_subscribers", "알림을 받는 채팅방 수 (모든 테넌트 합계)", lambda: sum(len(t.subscribers) for t in tenants))
+metrics.gauge("bot_reminder_heap", "알림 스케줄러 힙 크기 (취소된 항목 포함)", lambda: len(reminder_scheduler.heap))
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.message.chat_id
-    if "user_ids" not in context.application.bot_data:
-        context.application.bot_data["user_ids"] = load_user_ids()  # 파일에서 사용자 ID 불러오기
-    user_ids = context.application.bot_data["user_ids"]
-
-    if chat_id not in user_ids:
-        user_ids.add(chat_id)  # 사용자 ID 추가
-        save_user_ids(user_ids)  # 파일에 저장
+    if tenant().subscribers.add(chat_id):  # 새 사용자 ID 추가
+        tenant().subscribers.schedule_flush()  # 잠시 모았다가 한 번에 저장
 
     await update.message.reply_text(
-        "안녕하세요! 전교조 경기지부 일정 알림 봇입니다.\n도움말을 보시려면 /help 를 입력하세요.\n\n🔔 [알림] 3시간 전, 하루 전, 일주일 전"
+        f"안녕하세요! {tenant().display_name}입니다.\n도움말을 보시려면 /help 를 입력하세요.\n\n🔔 [알림] 3시간 전, 하루 전, 일주일 전"
     )
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -237,6 +2009,9 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "지난 30일 간의 일정을 확인합니다.\n\n"
         "`/history365`\n"
         "지난 1년 간의 일정을 확인합니다.\n\n"
+        "`/history 일수` 또는 `/history YYMMDD YYMMDD`\n"
+        "지정한 기간의 일정을 확인합니다.\n"
+        "예) `/history 90`, `/history 240101 241231`\n\n"
         "🔔 **알림**\n"
         "3시간 전, 하루 전, 일주일 전 알림 발송\n\n"
         "=======================\n\n"
@@ -291,15 +2066,13 @@ async def add_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("❌ 과거의 일정은 추가할 수 없습니다.")
             return
 
-        global_schedule.append({"time": event_time.strftime("%y%m%d %H%M"), "description": description})
-        save_data(DATA_FILE, global_schedule)
-        
-        # 요일을 한글로 변환
-        day_of_week_map = {"Mon": "월", "Tue": "화", "Wed": "수", "Thu": "목", "Fri": "금", "Sat": "토", "Sun": "일"}
-        day_of_week = day_of_week_map[event_time.strftime("%a")]
+        event = Schedule.from_datetime(event_time, description)
+        tenant().schedule_index.add(event)
+        reminder_scheduler.add(event)
+        expiry_wakeup.set()
+        tenant().render_cache.invalidate()
 
-        am_pm_korean = "오전" if event_time.strftime("%p") == "AM" else "오후"
-        formatted_time = event_time.strftime(f"%y/%m/%d({day_of_week}) {am_pm_korean} %I:%M")
+        formatted_time = format_event_time(event.timestamp)
 
         await update.message.reply_text(f"✅ 새 일정이 추가되었습니다\n일정: {description}\n일시: {formatted_time}")
     except Exception:
@@ -308,15 +2081,14 @@ async def add_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
 @admin_only
 async def edit_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        global global_schedule, mute_schedules
 
         args = context.args
         if len(args) < 4:
             await update.message.reply_text("❌ 명령어 형식이 올바르지 않습니다.\n예) /edit [번호] [YYMMDD HHMM] [내용]")
             return
 
-        # 수정할 일정의 인덱스
-        idx = int(args[0]) - 1  # 사용자는 1부터 시작, 리스트는 0부터 시작
+        # 수정할 일정의 번호 (사용자는 1부터 시작)
+        number = int(args[0])
         date_time = " ".join(args[1:3])  # 새로운 날짜 및 시간
         description = " ".join(args[3:])  # 새로운 일정 내용
         event_time = KST.localize(datetime.strptime(date_time, "%y%m%d %H%M"))
@@ -326,34 +2098,32 @@ async def edit_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("❌ 과거의 일정으로 수정할 수 없습니다.")
             return
 
-        # 정렬된 일정 가져오기
-        sorted_schedules = sorted(global_schedule, key=lambda x: datetime.strptime(x["time"], "%y%m%d %H%M"))
+        # 번호로 일정 가져오기 (목록은 항상 시각 순으로 정렬되어 있음)
+        original_event = tenant().schedule_index.get(number)
 
         # 유효한 인덱스 확인
-        if 0 <= idx < len(sorted_schedules):
-            original_event = sorted_schedules[idx]
-            original_id = original_event["time"] + "_" + original_event["description"]  # 기존 고유 ID
+        if original_event is not None:
+            original_id = original_event.id  # 기존 고유 ID
+            original_ts = original_event.timestamp
 
-            # 새 고유 ID 생성
-            new_id = event_time.strftime("%y%m%d %H%M") + "_" + description
+            # 일정 수정 (기존 알림 취소 후 새 시각으로 예약)
+            reminder_scheduler.remove(original_event)
+            tenant().schedule_index.edit(original_event, event_time, description)  # 정렬 위치 갱신 및 저장
+            if original_event.id != original_id and not tenant().schedule_index.has_id(original_id, original_ts):
+                tenant().reminder_jobs.discard([original_id])  # 바뀌기 전 ID의 알림 작업 정리 (같은 일정이 남아 있으면 유지)
+            reminder_scheduler.add(original_event)
+            expiry_wakeup.set()
 
-            # 일정 수정
-            original_event["time"] = event_time.strftime("%y%m%d %H%M")
-            original_event["description"] = description
+            # 새 고유 ID
+            new_id = original_event.id
 
             # mute 상태 업데이트
-            if original_id in mute_schedules:
-                mute_schedules.remove(original_id)  # 기존 ID 제거
-                mute_schedules.add(new_id)         # 새 ID 추가
-
-            # 데이터 저장
-            save_data(DATA_FILE, global_schedule)
+            if original_id in tenant().mute_schedules:
+                tenant().mute_schedules.remove(original_id)  # 기존 ID 제거
+                tenant().mute_schedules.add(new_id)         # 새 ID 추가
+            tenant().render_cache.invalidate()
 
-            # 요일 및 시간 변환
-            day_of_week_map = {"Mon": "월", "Tue": "화", "Wed": "수", "Thu": "목", "Fri": "금", "Sat": "토", "Sun": "일"}
-            day_of_week = day_of_week_map[event_time.strftime("%a")]
-            am_pm_korean = "오전" if event_time.strftime("%p") == "AM" else "오후"
-            formatted_time = event_time.strftime(f"%y/%m/%d({day_of_week}) {am_pm_korean} %I:%M")
+            formatted_time = format_event_time(original_event.timestamp)
 
             await update.message.reply_text(f"✅ 일정이 수정되었습니다\n일정: {description}\n일시: {formatted_time}")
         else:
@@ -363,101 +2133,170 @@ async def edit_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception:
         await update.message.reply_text(f"❌ 일정을 수정할 수 없습니다. 올바른 형식인지 확인하세요.\n예) /edit 3 241231 1500 새해맞이 준비")
 
-async def view_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
+def split_message(text, limit=MESSAGE_LIMIT):
+    """텔레그램 길이 제한을 넘지 않도록 줄 단위로 나눈 메시지 목록."""
+    chunks = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > limit:  # 한 줄이 제한보다 길면 강제로 자름
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if len(current) + len(line) > limit:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current or not chunks:
+        chunks.append(current)
+    return chunks
+
+def page_starts(descriptions, budget):
+    """일정 설명 길이 목록을 페이지로 나눈 각 페이지 첫 일정의 위치.
+
+    한 페이지는 PAGE_SIZE개 이하이고, 줄 길이의 합이 budget을 넘지 않아 버튼으로 고칠 때도 일정이 잘리지 않는다.
+    """
+    starts = [0]
+    used = 0
+    for index, length in enumerate(descriptions):
+        line = len(str(index + 1)) + length + PAGE_LINE_OVERHEAD
+        if index > starts[-1] and (index - starts[-1] >= PAGE_SIZE or used + line > budget):
+            starts.append(index)
+            used = 0
+        used += line
+    return starts
+
+def page_keyboard(prefix, page, pages):
+    """이전/다음 페이지 버튼. 한 페이지뿐이면 None."""
+    if pages <= 1:
+        return None
+    buttons = []
+    if page > 1:
+        buttons.append(InlineKeyboardButton("◀ 이전", callback_data=f"{prefix}:{page - 1}"))
+    buttons.append(InlineKeyboardButton(f"{page}/{pages}", callback_data="noop"))
+    if page < pages:
+        buttons.append(InlineKeyboardButton("다음 ▶", callback_data=f"{prefix}:{page + 1}"))
+    return InlineKeyboardMarkup([buttons])
+
+async def reply_pages(update: Update, text, keyboard=None):
+    """응답을 길이 제한에 맞춰 나눠 보내고, 페이지 버튼은 마지막 메시지에 붙임."""
+    chunks = split_message(text)
+    for chunk in chunks[:-1]:
+        await update.message.reply_text(chunk)
+    await update.message.reply_text(chunks[-1], reply_markup=keyboard)
+
+def history_window(spec):
+    """('d', 일수) 또는 ('r', 시작 ts, 끝 ts)를 (시작, 끝, 제목)으로 변환."""
     now = datetime.now(KST)
-    thirty_days_ago = now - timedelta(days=30)
+    if spec[0] == "d":
+        days = spec[1]
+        return now - timedelta(days=days), now, "지난 1년 간" if days == 365 else f"지난 {days}일 간"
+    start = datetime.fromtimestamp(spec[1], KST)
+    end = datetime.fromtimestamp(spec[2], KST)
+    return start, end, f"{start.strftime('%y/%m/%d')}~{(end - timedelta(days=1)).strftime('%y/%m/%d')}"
+
+def render_history(spec, page=1):
+    """지난 일정 한 페이지의 (문구, 전체 페이지 수, 가장 오래된 일정의 시각)."""
+    start, end, title = history_window(spec)
+    start_ts, end_ts = start.timestamp(), end.timestamp()
 
     # 과거 일정 로드
-    if not past_schedule:
-        await update.message.reply_text("🔍 저장된 과거 일정이 없습니다.")
-        return
-
-    # 지난 30일 간의 일정 필터링
+    if not len(tenant().history_index):
+        return "🔍 저장된 과거 일정이 없습니다.", 1, None
+
+    # 페이지 경계는 구간마다 한 번만 계산해 캐시하고, 요청한 페이지의 일정만 색인에서 조회
+    header = f"📅 {title}의 일정:\n"
+    starts, total, oldest = history_pages(spec, start_ts, end_ts, MESSAGE_LIMIT - len(header))
+    if not total:
+        return f"🔍 {title}의 일정이 없습니다.", 1, None
+
+    pages = len(starts)
+    page = min(max(page, 1), pages)
+    offset = starts[page - 1]
+    end = starts[page] if page < pages else total
+    events = tenant().history_index.between(start_ts, end_ts, offset, end - offset)
+
+    # 날짜 형식: 현재 연도와 같으면 MM/DD, 다르면 YY/MM/DD
+    formatted_times = format_event_times((event.timestamp for event in events), "short")
+    lines = [
+        f"{i}. {formatted_time} - {event.description}\n"
+        for i, (formatted_time, event) in enumerate(zip(formatted_times, events), start=offset + 1)
+    ]
+    return header + "".join(lines), pages, oldest
+
+def history_expires_at(spec, oldest):
+    """'지난 N일' 구간은 가장 오래된 일정이 구간 밖으로 밀려날 때 만료."""
+    return oldest + spec[1] * 86400 if spec[0] == "d" and oldest is not None else float("inf")
+
+def history_pages(spec, start_ts, end_ts, budget):
+    """구간의 (페이지 시작 위치 목록, 일정 수, 가장 오래된 일정의 시각). 구간마다 한 번만 계산해 캐시."""
+    cache_key = ("history-pages", spec)
+    cached = tenant().render_cache.get(cache_key)
+    if cached is None:
+        lengths = tenant().history_index.description_lengths(start_ts, end_ts)
+        oldest = tenant().history_index.between(start_ts, end_ts, 0, 1)[0].timestamp if lengths else None
+        cached = (page_starts(lengths, budget), len(lengths), oldest)
+        tenant().render_cache.put(cache_key, cached, history_expires_at(spec, oldest))
+    return cached
+
+def cached_history(spec, page=1):
+    """지난 일정 페이지 (문구, 전체 페이지 수). '지난 N일'은 가장 오래된 일정이 구간 밖으로 밀려날 때 만료."""
+    cache_key = ("history", spec, page)
+    cached = tenant().render_cache.get(cache_key)
+    if cached is None:
+        text, pages, oldest = render_history(spec, page)
+        expires_at = history_expires_at(spec, oldest)
+        cached = (text, pages)
+        tenant().render_cache.put(cache_key, cached, expires_at)
+    return cached
+
+async def reply_history(update: Update, spec):
+    """지난 일정 첫 페이지를 전송."""
     try:
-        recent_events = [
-            {"time": item["time"], "description": item["description"]}
-            for item in past_schedule
-            if thirty_days_ago <= KST.localize(datetime.strptime(item["time"], "%y%m%d %H%M")) < now
-        ]
-
-        if recent_events:
-            response = "📅 지난 30일 간의 일정:\n"
-            for i, event in enumerate(recent_events, start=1):
-                event_time = KST.localize(datetime.strptime(event["time"], "%y%m%d %H%M"))
-                day_of_week_map = {"Mon": "월", "Tue": "화", "Wed": "수", "Thu": "목", "Fri": "금", "Sat": "토", "Sun": "일"}
-                day_of_week = day_of_week_map[event_time.strftime("%a")]
-
-                am_pm_korean = "오전" if event_time.strftime("%p") == "AM" else "오후"
-
-                # 날짜 형식 결정: 현재 연도와 같으면 MM/DD, 다르면 YY/MM/DD
-                if event_time.year == now.year:
-                    formatted_date = event_time.strftime("%m/%d")  # MM/DD
-                else:
-                    formatted_date = event_time.strftime("%y/%m/%d")  # YY/MM/DD
-
-                formatted_time = f"{formatted_date}({day_of_week}) {am_pm_korean} {event_time.strftime('%I:%M')}"
-                response += f"{i}. {formatted_time} - {event['description']}\n"
-        else:
-            response = "🔍 지난 30일 간의 일정이 없습니다."
-
+        text, pages = cached_history(spec)
     except Exception as e:
-        response = f"❌ 오류 발생: {e}"
-
-    await update.message.reply_text(response)
-
-async def view_history_365(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    now = datetime.now(KST)
-    thirty_days_ago = now - timedelta(days=365)
-
-    # 과거 일정 로드
-    if not past_schedule:
-        await update.message.reply_text("🔍 저장된 과거 일정이 없습니다.")
+        await update.message.reply_text(f"❌ 오류 발생: {e}")
         return
+    await reply_pages(update, text, page_keyboard("hist:" + ":".join(map(str, spec)), 1, pages))
 
-    # 지난 1년 간의 일정 필터링
-    try:
-        recent_events = [
-            {"time": item["time"], "description": item["description"]}
-            for item in past_schedule
-            if thirty_days_ago <= KST.localize(datetime.strptime(item["time"], "%y%m%d %H%M")) < now
-        ]
-
-        if recent_events:
-            response = "📅 지난 1년 간의 일정:\n"
-            for i, event in enumerate(recent_events, start=1):
-                event_time = KST.localize(datetime.strptime(event["time"], "%y%m%d %H%M"))
-                day_of_week_map = {"Mon": "월", "Tue": "화", "Wed": "수", "Thu": "목", "Fri": "금", "Sat": "토", "Sun": "일"}
-                day_of_week = day_of_week_map[event_time.strftime("%a")]
-
-                am_pm_korean = "오전" if event_time.strftime("%p") == "AM" else "오후"
-
-                # 날짜 형식 결정: 현재 연도와 같으면 MM/DD, 다르면 YY/MM/DD
-                if event_time.year == now.year:
-                    formatted_date = event_time.strftime("%m/%d")  # MM/DD
-                else:
-                    formatted_date = event_time.strftime("%y/%m/%d")  # YY/MM/DD
+async def view_history(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/history (30일), /history 일수, /history YYMMDD YYMMDD (기간)."""
+    args = context.args or []
 
-                formatted_time = f"{formatted_date}({day_of_week}) {am_pm_korean} {event_time.strftime('%I:%M')}"
-                response += f"{i}. {formatted_time} - {event['description']}\n"
+    try:
+        if not args:
+            await reply_history(update, ("d", 30))
+        elif len(args) == 1:
+            days = int(args[0])
+            if days <= 0:
+                raise ValueError
+            await reply_history(update, ("d", days))
+        elif len(args) == 2:
+            start = KST.localize(datetime.strptime(args[0], "%y%m%d"))
+            end = KST.localize(datetime.strptime(args[1], "%y%m%d")) + timedelta(days=1)  # 마지막 날 포함
+            if end <= start:
+                raise ValueError
+            await reply_history(update, ("r", int(start.timestamp()), int(end.timestamp())))
         else:
-            response = "🔍 지난 1년 간의 일정이 없습니다."
-
-    except Exception as e:
-        response = f"❌ 오류 발생: {e}"
+            raise ValueError
+    except ValueError:
+        await update.message.reply_text("❌ 형식이 올바르지 않습니다.\n예) /history 90 또는 /history 240101 241231")
 
-    await update.message.reply_text(response)
+async def view_history_365(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await reply_history(update, ("d", 365))
 
 @admin_only
 async def mute_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        idx = int(context.args[0]) - 1
-        sorted_schedules = sorted(global_schedule, key=lambda x: datetime.strptime(x["time"], "%y%m%d %H%M"))
-
-        if 0 <= idx < len(sorted_schedules):
-            schedule_id = sorted_schedules[idx]["time"] + "_" + sorted_schedules[idx]["description"]
-            mute_schedules.add(schedule_id)
-            save_mute_schedules(mute_schedules)  # 상태 저장
-            await update.message.reply_text(f"✅ 일정이 음소거 처리되었습니다:\n{sorted_schedules[idx]['description']}")
+        schedule = tenant().schedule_index.get(int(context.args[0]))
+
+        if schedule is not None:
+            schedule_id = schedule.id
+            tenant().mute_schedules.add(schedule_id)
+            save_mute_schedules(tenant().mute_schedules)  # 상태 저장
+            tenant().render_cache.invalidate()
+            await update.message.reply_text(f"✅ 일정이 음소거 처리되었습니다:\n{schedule.description}")
         else:
             await update.message.reply_text("❌ 유효한 번호를 입력하세요.")
     except ValueError:
@@ -468,15 +2307,15 @@ async def mute_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
 @admin_only
 async def unmute_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        idx = int(context.args[0]) - 1
-        sorted_schedules = sorted(global_schedule, key=lambda x: datetime.strptime(x["time"], "%y%m%d %H%M"))
-
-        if 0 <= idx < len(sorted_schedules):
-            schedule_id = sorted_schedules[idx]["time"] + "_" + sorted_schedules[idx]["description"]
-            if schedule_id in mute_schedules:
-                mute_schedules.remove(schedule_id)
-                save_mute_schedules(mute_schedules)  # 상태 저장
-                await update.message.reply_text(f"✅ 일정이 음소거 해제 처리되었습니다:\n{sorted_schedules[idx]['description']}")
+        schedule = tenant().schedule_index.get(int(context.args[0]))
+
+        if schedule is not None:
+            schedule_id = schedule.id
+            if schedule_id in tenant().mute_schedules:
+                tenant().mute_schedules.remove(schedule_id)
+                save_mute_schedules(tenant().mute_schedules)  # 상태 저장
+                tenant().render_cache.invalidate()
+                await update.message.reply_text(f"✅ 일정이 음소거 해제 처리되었습니다:\n{schedule.description}")
             else:
                 await update.message.reply_text("❌ 해당 일정은 음소거 상태가 아닙니다.")
         else:
@@ -486,170 +2325,206 @@ async def unmute_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception:
         await update.message.reply_text(f"❌ 음소거 처리 중 오류가 발생했습니다. 올바른 형식인지 확인하세요.\n예) /unmute 4")
 
-async def list_schedules(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    if not global_schedule:
-        await update.message.reply_text("❌ 일정이 없습니다.")
-        return
-
-    # 일정 시간 순으로 정렬
-    sorted_schedules = sorted(global_schedule, key=lambda x: datetime.strptime(x["time"], "%y%m%d %H%M"))
-
-    message = "📅 등록된 일정:\n"
-    for idx, schedule in enumerate(sorted_schedules, start=1):
-        event_time = datetime.strptime(schedule["time"], "%y%m%d %H%M")
-        day_of_week_map = {"Mon": "월", "Tue": "화", "Wed": "수", "Thu": "목", "Fri": "금", "Sat": "토", "Sun": "일"}
-        day_of_week = day_of_week_map[event_time.strftime("%a")]
+def render_schedule_list(page=1):
+    """/list 한 페이지의 (문구, 전체 페이지 수)."""
+    if not tenant().schedule_index.items:
+        return "❌ 일정이 없습니다.", 1
+
+    # 일정은 항상 시간 순으로 정렬되어 있어, 설명 길이로 나눈 페이지 경계(캐시)에서 요청한 페이지만 잘라서 표시
+    items = tenant().schedule_index.items
+    header = "📅 등록된 일정:\n"
+    footer = "\n* : 알림이 울리지 않도록 설정된 일정"
+    starts = tenant().render_cache.get(("list-pages",))
+    if starts is None:
+        starts = page_starts([len(schedule.description) for schedule in items], MESSAGE_LIMIT - len(header) - len(footer))
+        tenant().render_cache.put(("list-pages",), starts)
+    pages = len(starts)
+    page = min(max(page, 1), pages)
+    offset = starts[page - 1]
+    schedules = items[offset:starts[page] if page < pages else len(items)]
+
+    # 날짜 형식: 현재 연도와 같으면 MM/DD, 다르면 YY/MM/DD
+    formatted_times = format_event_times((schedule.timestamp for schedule in schedules), "short")
+    lines = [
+        # mute된 일정은 * 표시
+        f"{idx}. {formatted_time} - {'*' if schedule.id in tenant().mute_schedules else ''}{schedule.description}\n"
+        for idx, (formatted_time, schedule) in enumerate(zip(formatted_times, schedules), start=offset + 1)
+    ]
+    message = header + "".join(lines)
 
-        am_pm_korean = "오전" if event_time.strftime("%p") == "AM" else "오후"
+    # mute 기능 설명 추가
+    message += footer
+    return message, pages
 
-        # 날짜 형식 결정: 현재 연도와 같으면 MM/DD, 다르면 YY/MM/DD
-        now = datetime.now()
-        if event_time.year == now.year:
-            formatted_date = event_time.strftime("%m/%d")  # MM/DD
-        else:
-            formatted_date = event_time.strftime("%y/%m/%d")  # YY/MM/DD
+def cached_schedule_list(page=1):
+    # 일정·mute가 바뀌지 않았으면 이전에 만든 문구를 그대로 사용
+    cached = tenant().render_cache.get(("list", page))
+    if cached is None:
+        cached = render_schedule_list(page)
+        tenant().render_cache.put(("list", page), cached)
+    return cached
 
-        formatted_time = f"{formatted_date}({day_of_week}) {am_pm_korean} {event_time.strftime('%I:%M')}"
-        
-        # mute 여부 확인
-        schedule_id = schedule["time"] + "_" + schedule["description"]
-        mute_icon = "*" if schedule_id in mute_schedules else ""
+async def list_schedules(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    message, pages = cached_schedule_list()
+    await reply_pages(update, message, page_keyboard("list", 1, pages))
+
+async def page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/list, /history 페이지 이동 버튼 처리."""
+    query = update.callback_query
+    await query.answer()
+    if query.data == "noop":
+        return
 
-        message += f"{idx}. {formatted_time} - {mute_icon}{schedule['description']}\n"
+    kind, *params = query.data.split(":")
+    page = int(params[-1])
+    if kind == "list":
+        text, pages = cached_schedule_list(page)
+        prefix = "list"
+    else:
+        spec = (params[0], *map(int, params[1:-1]))
+        text, pages = cached_history(spec, page)
+        prefix = "hist:" + ":".join(params[:-1])
 
-    # mute 기능 설명 추가
-    message += "\n* : 알림이 울리지 않도록 설정된 일정"
-    await update.message.reply_text(message)
+    # 페이지는 길이 제한에 맞춰 나눴으므로, 한 줄이 제한보다 긴 경우에만 첫 조각으로 잘림
+    try:
+        await query.edit_message_text(split_message(text)[0], reply_markup=page_keyboard(prefix, min(page, pages), pages))
+    except BadRequest as e:
+        if "message is not modified" not in e.message.lower():  # 같은 버튼을 두 번 누른 경우는 무시
+            raise
 
 @admin_only
 async def delete_schedule(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        idx = int(context.args[0]) - 1  # 삭제할 일정 번호
-        sorted_schedules = sorted(global_schedule, key=lambda x: datetime.strptime(x["time"], "%y%m%d %H%M"))
-
-        if 0 <= idx < len(sorted_schedules):
-            deleted = sorted_schedules[idx]
-            global_schedule.remove(deleted)
-            save_data(DATA_FILE, global_schedule)
-            event_time = datetime.strptime(deleted["time"], "%y%m%d %H%M")
+        deleted = tenant().schedule_index.get(int(context.args[0]))  # 삭제할 일정 번호
 
-            day_of_week_map = {"Mon": "월", "Tue": "화", "Wed": "수", "Thu": "목", "Fri": "금", "Sat": "토", "Sun": "일"}
-            day_of_week = day_of_week_map[event_time.strftime("%a")]
+        if deleted is not None:
+            tenant().schedule_index.remove(deleted)
+            tenant().render_cache.invalidate()
+            reminder_scheduler.remove(deleted)
+            tenant().reminder_jobs.discard(tenant().schedule_index.unshared_ids([deleted]))
+            formatted_time = format_event_time(deleted.timestamp)
 
-            am_pm_korean = "오전" if event_time.strftime("%p") == "AM" else "오후"
-            formatted_time = event_time.strftime(f"%y/%m/%d({day_of_week}) {am_pm_korean} %I:%M")
-
-            await update.message.reply_text(f"✅ 일정이 삭제되었습니다\n일정: {deleted['description']}\n일시: {formatted_time}")
+            await update.message.reply_text(f"✅ 일정이 삭제되었습니다\n일정: {deleted.description}\n일시: {formatted_time}")
         else:
             await update.message.reply_text("❌ 유효한 번호를 입력하세요.\n예) /del 1")
     except Exception:
         await update.message.reply_text("❌ 일정 삭제 중 오류가 발생했습니다.")
 
 async def update_schedule():
-    global global_schedule, past_schedule
-    now = datetime.now(KST)  # KST 시간대의 현재 시간
-    updated_schedule = []
-
-    for event in global_schedule:
-        # event_time을 KST 시간대로 변환
-        event_time = KST.localize(datetime.strptime(event["time"], "%y%m%d %H%M"))
-        
-        # 시간 비교 시 같은 시간대 객체로 비교
-        if event_time < now:
-            past_schedule.append(event)
-        else:
-            updated_schedule.append(event)
+    # 정렬된 목록의 앞에서부터 지난 일정만 꺼냄
+    expired = tenant().schedule_index.pop_expired(time.time())
 
-    global_schedule = updated_schedule
-    save_data(DATA_FILE, global_schedule)
-    save_data(HISTORY_FILE, past_schedule)
+    # 지난 일정이 없으면 파일을 건드리지 않음
+    if not expired:
+        return
 
-async def notify_schedules(application: Application):
-    print("🔄 notify_schedules 태스크 시작")
-    while True:
-        try:
-            now = datetime.now(KST)
-            user_ids = application.bot_data.get("user_ids", [])
-            print(f"현재 시간: {now}, 알림 대상 사용자 IDs: {set(user_ids)}")
+    for event in expired:
+        reminder_scheduler.remove(event)
+    tenant().history_index.extend(expired)
+    tenant().render_cache.invalidate()
 
-            if not user_ids:
-                await asyncio.sleep(60)
-                continue
+    # 지난 일정의 알림 작업 정리 (같은 ID의 일정이 아직 남아 있으면 유지)
+    tenant().reminder_jobs.discard(tenant().schedule_index.unshared_ids(expired))
 
-            for schedule in global_schedule[:]:
-                event_time = KST.localize(datetime.strptime(schedule["time"], "%y%m%d %H%M"))
-                description = schedule["description"]
-                schedule_id = schedule["time"] + "_" + description  # 고유 ID 생성
+async def send_reminder(schedule, kind, fire_ts=None):
+    """일정 하나에 대한 알림을 현재 테넌트의 모든 사용자에게 전송. fire_ts는 지연 시간 지표용 예정 알림 시각."""
+    owner = tenant()
+    description = schedule.description
+    schedule_id = schedule.id
 
-                # Mute된 일정은 알림 제외
-                if schedule_id in mute_schedules:
-                    continue
+    job_key = (schedule_id, kind)
+
+    # Mute된 일정의 알림은 건너뛴 것으로 기록 (재시작·mute 해제 후 뒤늦게 보내지 않도록)
+    if schedule_id in owner.mute_schedules:
+        owner.reminder_jobs.complete(job_key, schedule)
+        return
+
+    # 이미 시작된 일정은 알림 제외
+    if schedule.timestamp <= time.time():
+        return
 
-                time_diff = event_time - now
-                unique_id_hour = f"{event_time.strftime('%y%m%d %H%M')}_{description}_hour"
-                unique_id_day = f"{event_time.strftime('%y%m%d %H%M')}_{description}_day"
-                unique_id_week = f"{event_time.strftime('%y%m%d %H%M')}_{description}_week"
-
-                day_of_week_map = {"Mon": "월", "Tue": "화", "Wed": "수", "Thu": "목", "Fri": "금", "Sat": "토", "Sun": "일"}
-                day_of_week = day_of_week_map[event_time.strftime("%a")]
-                am_pm_korean = "오전" if event_time.strftime("%p") == "AM" else "오후"
-                formatted_time = event_time.strftime(f"%y/%m/%d({day_of_week}) {am_pm_korean} %I:%M").lstrip('0').replace(' 0', ' ')
-
-                # 로그 출력: 이벤트 시간 및 남은 시간
-                print(f"이벤트 시간: {event_time}, 남은 시간: {time_diff}")
-
-                if time_diff <= timedelta(minutes=180) and time_diff > timedelta(minutes=179):
-                    if unique_id_hour not in notified_schedules_hour:
-                        for chat_id in user_ids:
-                            try:
-                                await application.bot.send_message(
-                                    chat_id=chat_id,
-                                    text=f"🔔 [3시간 전 알림]\n일정: {description}\n시간: {formatted_time}"
-                                )
-                                print(f"🔔 [3시간 전 알림] - {description}, {formatted_time} - 알림이 발송됨")
-                            except Exception as e:
-                                print(f"❌ 알림 전송 실패 (3시간 전): {chat_id}, {e}")
-                        notified_schedules_hour.add(unique_id_hour)
-
-                if time_diff <= timedelta(days=1) and time_diff > timedelta(hours=23):
-                    if unique_id_day not in notified_schedules_day:
-                        for chat_id in user_ids:
-                            try:
-                                await application.bot.send_message(
-                                    chat_id=chat_id,
-                                    text=f"🔔 [하루 전 알림]\n일정: {description}\n시간: {formatted_time}"
-                                )
-                                print(f"🔔 [하루 전 알림] - {description}, {formatted_time} - 알림이 발송됨")
-                            except Exception as e:
-                                print(f"❌ 알림 전송 실패 (하루 전): {chat_id}, {e}")
-                        notified_schedules_day.add(unique_id_day)
-
-                if time_diff <= timedelta(weeks=1) and time_diff > timedelta(days=6):
-                    if unique_id_week not in notified_schedules_week:
-                        for chat_id in user_ids:
-                            try:
-                                await application.bot.send_message(
-                                    chat_id=chat_id,
-                                    text=f"🔔 [일주일 전 알림]\n일정: {description}\n시간: {formatted_time}"
-                                )
-                                print(f"🔔 [일주일 전 알림] - {description}, {formatted_time} - 알림이 발송됨")
-                            except Exception as e:
-                                print(f"❌ 알림 전송 실패 (일주일 전): {chat_id}, {e}")
-                        notified_schedules_week.add(unique_id_week)
-
-            # 이벤트별 체크 완료 후 로그 출력
-            print("✅ 알림 체크 완료")
-
-            await asyncio.sleep(60)  # 1분마다 실행
+    label = next(label for name, offset, label, window in REMINDER_OFFSETS if name == kind)
+
+    # 작업 큐에서 발송 권한을 얻음 (이미 보냈거나 catch-up 정책상 건너뛸 알림이면 None)
+    delivered = owner.reminder_jobs.claim(schedule, kind, time.time())
+    if delivered is None:
+        return
+
+    formatted_time = format_event_time(schedule.timestamp, "reminder")
+    text = f"🔔 [{label} 알림]\n일정: {description}\n시간: {formatted_time}"
+
+    # 앞선 알림의 발송을 기다린 시간까지 포함되도록 발송 직전에 기록
+    if fire_ts is not None:
+        metrics.reminder_lag.observe(time.time() - fire_ts, kind)
+
+    if cluster is not None:
+        # 클러스터 모드: 샤드별로 작업자 프로세스들이 나눠 보냄 (진행 상황은 클러스터 DB에 기록)
+        if not owner.subscribers:
+            logger.warning("[%s 알림] %s - 알림 대상 사용자가 없습니다.", label, description)
+            owner.reminder_jobs.complete(job_key)
+            return
+        owner.subscribers.flush()  # 작업자가 최신 구독자 목록을 읽도록 먼저 저장
+        result = await cluster.deliver(owner, f"{owner.name}/{schedule_id}/{kind}", text)
+    else:
+        # 재시작 전에 이미 받은 사용자는 제외
+        recipients = [chat_id for chat_id in owner.subscribers if chat_id not in delivered]
+        if not recipients:
+            if not owner.subscribers:
+                logger.warning("[%s 알림] %s - 알림 대상 사용자가 없습니다.", label, description)
+            owner.reminder_jobs.complete(job_key)
+            return
+
+        try:
+            result = await broadcaster.broadcast(
+                owner.application.bot,
+                recipients,
+                text,
+                on_delivered=lambda chat_id: owner.reminder_jobs.checkpoint(job_key, chat_id),
+                kind="reminder",
+            )
+        except asyncio.CancelledError:
+            # 종료로 발송이 중단되면 지금까지 보낸 대상을 저장하고 재시작 후 이어서 보냄
+            owner.reminder_jobs.save_progress(job_key)
+            raise
+    owner.reminder_jobs.complete(job_key)
+    logger.info(
+        "[%s 알림] %s, %s - %s", label, description, formatted_time, result.summary(),
+        extra={"kind": kind, "tenant": owner.name, "failures": result.error_counts()},
+    )
+    for chat_id, e in result.failed.items():
+        log_sampler.log(logging.DEBUG, "reminder_send_failed", "알림 전송 실패 (%s): %s, %r", label, chat_id, e)
+
+    # 바뀐 chat_id는 갱신하고 차단·삭제된 채팅방은 다음 알림부터 제외
+    migrated, removed = owner.subscribers.apply(result)
+    if migrated or removed:
+        logger.info("구독자 목록 갱신 - chat_id 변경 %d건, 삭제 %d건", migrated, len(removed))
+    owner.subscribers.schedule_flush()
+
+async def notify_schedules():
+    logger.info("notify_schedules 태스크 시작")
+    while True:
+        try:
+            # 다음 알림 시각까지만 대기 (일정이 추가/수정되면 즉시 깨어남)
+            await reminder_scheduler.wait()
+
+            metrics.loop_iterations.inc("notify_schedules")
+            now = time.time()
+            for owner, schedule, kind, fire_ts in reminder_scheduler.pop_due(now):
+                log_sampler.log(
+                    logging.DEBUG, "reminder_due", "[%s] 이벤트 시간: %s, 알림 종류: %s, 지연: %.1f초",
+                    owner.name, schedule.datetime, kind, now - fire_ts,
+                )
+                with use_tenant(owner):
+                    await send_reminder(schedule, kind, fire_ts)
         except Exception as e:
-            print(f"❌ notify_schedules 예외 발생: {e}")
-            await asyncio.sleep(60)
+            metrics.loop_errors.inc("notify_schedules")
+            logger.exception("notify_schedules 예외 발생: %s", e)
+            await asyncio.sleep(1)
 
 @admin_only
 async def user_count_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """등록된 사용자 수를 알려주는 명령어 (관리자 전용)."""
-    user_ids = context.application.bot_data.get("user_ids", set())
-    count = len(user_ids)
+    count = len(tenant().subscribers)
     await update.message.reply_text(f"👥 현재 등록된 사용자는 총 {count}명입니다.")
 
 @admin_only
@@ -670,52 +2545,60 @@ async def notice(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("❌ 공지 내용을 입력하세요.\n예) /noti 오늘 오후 3시에 회의가 있습니다.")
             return
 
-        # 사용자 ID 목록 불러오기
-        user_ids = context.application.bot_data.get("user_ids", set())
-        if not user_ids:
+        if not tenant().subscribers:
             await update.message.reply_text("❌ 알림을 보낼 대상이 없습니다.")
             return
 
-        # 오류가 발생한 사용자 ID를 저장할 리스트
-        failed_users = []
+        # 전송은 백그라운드 작업으로 실행하고 핸들러는 바로 반환 (그동안 다른 명령어도 처리됨)
+        chat_ids = list(tenant().subscribers)
+        progress_message = await update.message.reply_text(f"📤 공지 전송을 시작합니다. (대상 {len(chat_ids)}명)")
+        context.application.create_task(
+            run_notice_job(context.bot, update.message, progress_message, chat_ids, notice_message), update=update
+        )
 
-        # 각 사용자에게 메시지 전송
-        for chat_id in list(user_ids):  # 리스트 복사본 사용
-            try:
-                await context.bot.send_message(chat_id=chat_id, text=f"📢 알림:\n\n{notice_message}")
-            except Exception as e:
-                error_message = str(e)
-                # 그룹이 슈퍼그룹으로 마이그레이션된 경우 chat_id 업데이트
-                if "migrated to supergroup" in error_message and "New chat id" in error_message:
-                    import re
-                    match = re.search(r"New chat id: (-?\d+)", error_message)
-                    if match:
-                        new_chat_id = int(match.group(1))
-                        user_ids.remove(chat_id)
-                        user_ids.add(new_chat_id)
-                        save_user_ids(user_ids)
-                        await update.message.reply_text(f"ℹ️ 그룹 chat_id가 변경되어 {new_chat_id}로 갱신하였습니다.")
-                        continue
-                failed_users.append(chat_id)
-                user_ids.remove(chat_id)
-                await update.message.reply_text(f"❌ 사용자 {chat_id}에게 메시지 전송 실패: {e}")
+    except Exception as e:
+        await update.message.reply_text(f"❌ 공지사항 전송 중 예상치 못한 오류가 발생했습니다: {e}")
 
-        # 사용자 데이터 업데이트
-        save_user_ids(user_ids)
-        success_count = len(user_ids)
+async def run_notice_job(bot, message, progress_message, chat_ids, notice_message):
+    """/noti 공지를 모든 사용자에게 전송하고 결과를 관리자에게 알림."""
+    try:
+        text = f"📢 알림:\n\n{notice_message}"
+        if cluster is not None:
+            # 클러스터 모드: 알림과 같이 샤드별로 나눠 보내 클러스터 전체 전송 한도를 함께 지킴
+            tenant().subscribers.flush()  # 작업자가 최신 구독자 목록을 읽도록 먼저 저장
+            result = await cluster.deliver(tenant(), f"{tenant().name}/notice/{message.chat_id}/{progress_message.message_id}", text)
+        else:
+            # 모든 사용자에게 동시에(속도 제한 적용) 메시지 전송
+            result = await broadcast_with_progress(bot, chat_ids, text, progress_message, "공지", kind="notice")
+        logger.info("공지 전송 완료 - %s", result.summary(), extra={"failures": result.error_counts()})
+        try:
+            await progress_message.edit_text(f"📤 공지 전송 완료 ({result.done}/{result.total})")
+        except Exception as e:
+            logger.debug("진행 상황 메시지 수정 실패: %s", e)
+
+        # 바뀐 chat_id는 갱신하고, 차단·삭제된 채팅방만 목록에서 삭제 (일시적 오류는 유지)
+        migrated, removed = tenant().subscribers.apply(result)
+        tenant().subscribers.schedule_flush()
+        if migrated:
+            await message.reply_text(f"ℹ️ 그룹 chat_id가 변경된 {migrated}개 대상을 새 chat_id로 갱신하였습니다.")
+
+        success_count = len(result.delivered)
+        kept_count = len(result.failed) - len(removed)
 
         # 결과 메시지 출력
-        if failed_users:
-            await update.message.reply_text(
-                f"⚠️ 차단 등으로 {len(failed_users)}개 대상에 메시지 전송 실패.\n"
-                f"사용자 목록에서 삭제하였습니다.\n"
-                f"✅ 공지사항이 모든 사용자({success_count}명)에게 전송되었습니다."
+        if result.failed:
+            await message.reply_text(
+                f"⚠️ {len(result.failed)}개 대상에 메시지 전송 실패.\n"
+                + (f"차단 등으로 전송할 수 없는 {len(removed)}개 대상은 사용자 목록에서 삭제하였습니다.\n" if removed else "")
+                + (f"일시적 오류로 실패한 {kept_count}개 대상은 목록에 유지합니다.\n" if kept_count else "")
+                + f"✅ 공지사항이 {success_count}명에게 전송되었습니다."
             )
         else:
-            await update.message.reply_text(f"✅ 공지사항이 모든 사용자({success_count}명)에게 전송되었습니다.")
+            await message.reply_text(f"✅ 공지사항이 모든 사용자({success_count}명)에게 전송되었습니다.")
 
     except Exception as e:
-        await update.message.reply_text(f"❌ 공지사항 전송 중 예상치 못한 오류가 발생했습니다: {e}")
+        logger.exception("공지 전송 작업 실패: %s", e)
+        await message.reply_text(f"❌ 공지사항 전송 중 예상치 못한 오류가 발생했습니다: {e}")
 
 # 관리자에게만 공지 전송하는 /adminnoti 명령어
 @admin_only
@@ -737,36 +2620,31 @@ async def admin_notice(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         # 관리자 목록 불러오기
-        admins = load_admins()
+        admins = tenant().admin_registry.list()
         if not admins:
             await update.message.reply_text("❌ 등록된 관리자가 없습니다.")
             return
 
-        # 실패한 관리자 목록 저장
-        failed_admins = []
-
         # 각 관리자에게 메시지 전송
-        for admin in admins:
-            chat_id = admin["chat_id"]
-            try:
-                await context.bot.send_message(chat_id=chat_id, text=f"📢 관리자용 알림:\n\n{notice_message}")
-            except Exception as e:
-                error_message = str(e)
-                # 그룹이 슈퍼그룹으로 마이그레이션된 경우 chat_id 업데이트
-                if "migrated to supergroup" in error_message and "New chat id" in error_message:
-                    import re
-                    match = re.search(r"New chat id: (-?\d+)", error_message)
-                    if match:
-                        new_chat_id = int(match.group(1))
-                        admin["chat_id"] = new_chat_id
-                        save_admins(admins)
-                        await update.message.reply_text(f"ℹ️ 관리자 chat_id가 변경되어 {new_chat_id}로 갱신하였습니다.")
-                        continue
-                failed_admins.append(chat_id)
-                await update.message.reply_text(f"❌ 관리자 {chat_id}에게 메시지 전송 실패: {e}")
+        result = await broadcaster.broadcast(
+            context.bot, [admin["chat_id"] for admin in admins], f"📢 관리자용 알림:\n\n{notice_message}", kind="admin_notice"
+        )
+        logger.info("관리자 공지 전송 완료 - %s", result.summary(), extra={"failures": result.error_counts()})
+
+        # 그룹이 슈퍼그룹으로 마이그레이션된 경우 chat_id 업데이트
+        # 관리자 채팅방이 구독자이기도 하면 구독자 목록에도 반영
+        tenant().subscribers.apply(result)
+        tenant().subscribers.schedule_flush()
+        if result.migrated:
+            tenant().admin_registry.migrate_chat_ids(result.migrated)
+            await update.message.reply_text(f"ℹ️ 관리자 chat_id가 변경된 {len(result.migrated)}개 대상을 새 chat_id로 갱신하였습니다.")
+
+        failed_admins = list(result.failed)
+        for chat_id, e in result.failed.items():
+            await update.message.reply_text(f"❌ 관리자 {chat_id}에게 메시지 전송 실패: {e}")
 
         # 결과 메시지 출력
-        success_count = len(admins) - len(failed_admins)
+        success_count = result.total - len(failed_admins)
 
         if failed_admins:
             await update.message.reply_text(
@@ -831,14 +2709,13 @@ async def ok_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         confirm_task.cancel()
 
     if confirm_action == "delall":
-        global global_schedule
-        global_schedule = []  # 모든 일정 삭제
-        save_data(DATA_FILE, global_schedule)
+        tenant().schedule_index.clear()  # 모든 일정 삭제
+        tenant().render_cache.invalidate()
+        reminder_scheduler.reload(tenant().schedule_index.items)
         await update.message.reply_text("✅ 모든 일정이 삭제되었습니다.")
     elif confirm_action == "delhistory":
-        global past_schedule
-        past_schedule = []  # 과거 일정 초기화
-        save_data(HISTORY_FILE, past_schedule)
+        tenant().history_index.clear()  # 과거 일정 초기화
+        tenant().render_cache.invalidate()
         await update.message.reply_text("✅ 과거 일정이 초기화되었습니다.")
     else:
         await update.message.reply_text("❌ 확인할 작업이 없습니다.")
@@ -867,43 +2744,397 @@ async def fallback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # 단톡방 메시지는 무시
         return
 
-async def periodic_update_schedule():
-    print("🔄 periodic_update_schedule 태스크 시작")
+def next_expiry():
+    """모든 테넌트에서 가장 이른 예정 일정의 시각(timestamp). 일정이 없으면 None."""
+    return min((owner.schedule_index.items[0].timestamp for owner in tenants if owner.schedule_index.items), default=None)
+
+async def expire_schedules():
+    """가장 이른 일정의 시각이 되면 지난 일정을 정리 (일정 추가·수정 시 expiry_wakeup으로 다시 계산)."""
+    logger.info("expire_schedules 태스크 시작")
     while True:
         try:
-            await update_schedule()
-            await asyncio.sleep(60)  # 1분마다 실행
+            expiry_wakeup.clear()
+            metrics.loop_iterations.inc("expire_schedules")
+            started = time.perf_counter()
+            for owner in tenants:
+                with use_tenant(owner):
+                    await update_schedule()
+            metrics.update_schedule_duration.observe(time.perf_counter() - started)
+
+            # 다음 일정 시각까지만 대기 (일정 시각을 지난 직후 꺼내도록 약간 늦게 깨어남)
+            next_ts = next_expiry()
+            timeout = REMINDER_MAX_SLEEP if next_ts is None else min(REMINDER_MAX_SLEEP, next_ts - time.time() + 0.01)
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(expiry_wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
         except Exception as e:
-            print(f"❌ periodic_update_schedule 예외 발생: {e}")
+            metrics.loop_errors.inc("expire_schedules")
+            logger.exception("expire_schedules 예외 발생: %s", e)
             await asyncio.sleep(60)
 
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """여러 채팅방의 업데이트는 동시에 처리하고, 같은 채팅방의 업데이트는 받은 순서대로 하나씩 처리.
+
+    /admin 비밀번호·이름 입력이나 /delall -> /ok 확인처럼 앞 단계의 결과에 의존하는 흐름이 섞이지 않게 한다.
+    업데이트를 처리하는 동안 current_tenant를 이 봇의 테넌트로 설정한다.
+    동시 처리 수는 채팅방 순서를 기다리는 업데이트가 자리를 차지하지 않도록 채팅방 잠금을 얻은 뒤에 센다.
+    """
+
+    def __init__(self, max_concurrent_updates, owner):
+        # 부모 클래스의 세마포어는 do_process_update 전에 잡히므로 사실상 제한하지 않고 직접 제한
+        super().__init__(sys.maxsize)
+        self.owner = owner
+        self.locks = {}  # chat_id -> [asyncio.Lock, 대기 중인 업데이트 수]
+        self.slots = asyncio.Semaphore(max_concurrent_updates)
+
+    async def do_process_update(self, update, coroutine):
+        with use_tenant(self.owner):
+            await self._process_in_order(update, coroutine)
+
+    async def _process_in_order(self, update, coroutine):
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            async with self.slots:
+                await coroutine
+            return
+        entry = self.locks.get(chat.id)
+        if entry is None:
+            entry = self.locks[chat.id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:  # asyncio.Lock은 기다린 순서대로 넘겨줌
+                async with self.slots:
+                    await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.locks[chat.id]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+def shard_of(chat_id, shards):
+    """chat_id가 속한 샤드 번호 (모든 프로세스에서 같은 값이 나오도록 crc32 사용)."""
+    return zlib.crc32(str(chat_id).encode()) % shards
+
+class Cluster:
+    """CLUSTER_DB(SQLite 파일) 하나로 여러 프로세스가 역할을 나누는 클러스터 모드.
+
+    - 리더 임대(lease)를 가진 프로세스 하나만 텔레그램 업데이트를 받고 알림 시각을 계산한다.
+    - 알림 시각이 되면 리더는 발송 작업을 샤드 수만큼 나눠 등록하고, 각 프로세스는 자기 샤드 임대에 해당하는
+      구독자(chat_id 해시)에게 보낸다. 맡은 프로세스가 없는 샤드는 남는 프로세스가 가져간다.
+    - 임대는 LEASE_RENEW_INTERVAL마다 갱신하며, LEASE_TTL 동안 갱신이 없으면 다른 프로세스가 넘겨받는다.
+    """
+
+    def __init__(self, db_path, shards):
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS deliveries ("
+                "id TEXT PRIMARY KEY, tenant TEXT NOT NULL, text TEXT NOT NULL, shards INTEGER NOT NULL, created REAL NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS delivery_shards ("
+                "delivery_id TEXT NOT NULL, shard INTEGER NOT NULL, state TEXT NOT NULL, holder TEXT, "
+                "lease_until REAL NOT NULL DEFAULT 0, delivered TEXT NOT NULL DEFAULT '[]', result TEXT, "
+                "PRIMARY KEY (delivery_id, shard))"
+            )
+        self.shards = shards
+        # 샤드 발송 전용 전송기: 봇 하나의 전송 한도를 샤드 수만큼 나눠 클러스터 전체가 CLUSTER_RATE_LIMIT를 넘지 않게 함
+        self.broadcaster = Broadcaster(rate=CLUSTER_RATE_LIMIT / shards, processes=DELIVERY_PROCESSES)
+        self.holder = f"{socket.gethostname()}:{os.getpid()}"
+        self.shard = None  # 이 프로세스가 맡은 샤드 번호
+        self.leading = False
+        self.owners = {}  # 테넌트 이름 -> Tenant (리더가 되기 전에는 저장소만 연 상태)
+        self.bots = {}  # 테넌트 이름 -> 발송용 Bot
+        self.applications = []  # 리더일 때 업데이트를 받는 Application
+        self.leader_tasks = []
+
+    # 임대
+
+    def acquire(self, name, now):
+        """임대를 얻거나 갱신하고 성공 여부를 반환 (비어 있거나 만료된 임대만 넘겨받음)."""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at "
+                "WHERE leases.holder = excluded.holder OR leases.expires_at < ?",
+                (name, self.holder, now + LEASE_TTL, now),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, name):
+        with self.conn:
+            self.conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, self.holder))
+
+    def held_shards(self, now):
+        """임대가 살아 있는(맡은 프로세스가 있는) 샤드 번호."""
+        rows = self.conn.execute("SELECT name FROM leases WHERE name LIKE 'shard:%' AND expires_at >= ?", (now,))
+        return {int(name.split(":", 1)[1]) for name, in rows}
+
+    async def keep_leases(self):
+        """샤드·리더 임대를 주기적으로 갱신하고, 리더 자리를 얻거나 잃으면 업데이트 수신과 알림 루프를 켜고 끔."""
+        while True:
+            try:
+                now = time.time()
+                if self.shard is not None and not self.acquire(f"shard:{self.shard}", now):
+                    logger.warning("샤드 %d 임대를 잃었습니다.", self.shard)
+                    self.shard = None
+                if self.shard is None:
+                    self.shard = next((shard for shard in range(self.shards) if self.acquire(f"shard:{shard}", now)), None)
+                    if self.shard is not None:
+                        logger.info("샤드 %d/%d 담당", self.shard, self.shards)
+
+                leading = self.acquire("leader", now)
+                if leading and not self.leading:
+                    await self.promote()
+                elif not leading and self.leading:
+                    logger.warning("리더 임대를 잃었습니다. 작업자로 전환합니다.")
+                    await self.demote()
+            except Exception as e:
+                metrics.loop_errors.inc("cluster_leases")
+                logger.exception("임대 갱신 중 예외 발생: %s", e)
+            await asyncio.sleep(LEASE_RENEW_INTERVAL)
+
+    async def promote(self):
+        """리더가 됨: 저장소를 다시 읽고 업데이트 수신과 알림·일정 정리 루프를 시작."""
+        logger.info("리더로 선출됨 (%s)", self.holder)
+        self.leading = True
+        with self.conn:
+            # 리더가 바뀌는 사이 거둬지지 않은 오래된 발송 작업 정리
+            stale = time.time() - 86400
+            self.conn.execute(
+                "DELETE FROM delivery_shards WHERE delivery_id IN (SELECT id FROM deliveries WHERE created < ?)", (stale,)
+            )
+            self.conn.execute("DELETE FROM deliveries WHERE created < ?", (stale,))
+        try:
+            for owner in self.owners.values():
+                owner.load()
+                tenants.append(owner)
+            for owner in tenants:
+                application = build_application(owner)
+                await start_polling(application)
+                self.applications.append(application)
+            self.leader_tasks = await start_scheduler(None)
+        except Exception:
+            # 시작하지 못하면 리더 자리를 내놓아 다른 프로세스가 맡게 함
+            await self.demote()
+            self.release("leader")
+            raise
+
+    async def demote(self):
+        """리더 자리를 내려놓음: 루프와 업데이트 수신을 멈추고 남은 변경 사항을 저장."""
+        self.leading = False
+        for task in self.leader_tasks:
+            task.cancel()
+        await asyncio.gather(*self.leader_tasks, return_exceptions=True)
+        self.leader_tasks = []
+        for application in self.applications:
+            await stop_polling(application)
+        self.applications = []
+        await metrics.stop_server()
+        for owner in tenants:
+            with use_tenant(owner):
+                save_mute_schedules(owner.mute_schedules)
+                owner.subscribers.flush()
+        tenants.clear()
+        reminder_scheduler.clear()
+
+    # 리더: 발송 작업 등록과 결과 수집
+
+    async def deliver(self, owner, delivery_id, text):
+        """발송 작업을 샤드별로 등록하고 모두 끝날 때까지 기다린 뒤 합친 BroadcastResult를 반환.
+
+        같은 delivery_id가 이미 있으면(리더가 바뀌어 다시 등록) 남은 샤드만 이어서 보낸다.
+        """
+        started = time.monotonic()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO deliveries (id, tenant, text, shards, created) VALUES (?, ?, ?, ?, ?)",
+                (delivery_id, owner.name, text, self.shards, time.time()),
+            )
+            shards = self.conn.execute("SELECT shards FROM deliveries WHERE id = ?", (delivery_id,)).fetchone()[0]
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO delivery_shards (delivery_id, shard, state) VALUES (?, ?, 'pending')",
+                [(delivery_id, shard) for shard in range(shards)],
+            )
+
+        while True:
+            rows = self.conn.execute(
+                "SELECT state, result FROM delivery_shards WHERE delivery_id = ?", (delivery_id,)
+            ).fetchall()
+            if all(state == "done" for state, _ in rows):
+                break
+            await asyncio.sleep(CLUSTER_POLL_INTERVAL)
+
+        result = BroadcastResult(0)
+        for _, data in rows:
+            data = json.loads(data)
+            result.total += data["total"]
+            result.merge(data)
+        result.elapsed = time.monotonic() - started
+
+        with self.conn:
+            self.conn.execute("DELETE FROM delivery_shards WHERE delivery_id = ?", (delivery_id,))
+            self.conn.execute("DELETE FROM deliveries WHERE id = ?", (delivery_id,))
+        return result
+
+    # 작업자: 샤드 발송
+
+    def claim(self, now):
+        """보낼 샤드 작업 하나를 가져옴. 자기 샤드를 먼저, 맡은 프로세스가 없는 샤드는 누구든 가져감."""
+        held = self.held_shards(now)
+        rows = self.conn.execute(
+            "SELECT s.delivery_id, s.shard, d.tenant, d.text, d.shards, s.delivered "
+            "FROM delivery_shards s JOIN deliveries d ON d.id = s.delivery_id "
+            "WHERE s.state = 'pending' AND s.lease_until < ? ORDER BY d.created",
+            (now,),
+        ).fetchall()
+        rows.sort(key=lambda row: row[1] != self.shard)
+        for delivery_id, shard, tenant_name, text, shards, delivered in rows:
+            if shard != self.shard and shard in held:
+                continue
+            with self.conn:
+                cursor = self.conn.execute(
+                    "UPDATE delivery_shards SET holder = ?, lease_until = ? "
+                    "WHERE delivery_id = ? AND shard = ? AND state = 'pending' AND lease_until < ?",
+                    (self.holder, now + LEASE_TTL, delivery_id, shard, now),
+                )
+            if cursor.rowcount == 1:
+                return delivery_id, shard, tenant_name, text, shards, set(json.loads(delivered))
+        return None
+
+    def save_progress(self, delivery_id, shard, delivered, lease_until):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE delivery_shards SET delivered = ?, lease_until = ? WHERE delivery_id = ? AND shard = ? AND holder = ?",
+                (json.dumps(sorted(delivered)), lease_until, delivery_id, shard, self.holder),
+            )
+
+    async def _heartbeat(self, delivery_id, shard, delivered):
+        """발송 중 임대를 연장하며 보낸 대상을 기록 (프로세스가 죽으면 다른 프로세스가 남은 대상부터 이어서 보냄)."""
+        while True:
+            await asyncio.sleep(LEASE_RENEW_INTERVAL)
+            self.save_progress(delivery_id, shard, delivered, time.time() + LEASE_TTL)
+
+    async def deliver_shard(self, delivery_id, shard, tenant_name, text, shards, delivered):
+        owner = self.owners[tenant_name]
+        with use_tenant(owner):
+            chat_ids = load_user_ids()  # 리더가 저장한 최신 구독자 목록
+        recipients = [chat_id for chat_id in chat_ids if shard_of(chat_id, shards) == shard and chat_id not in delivered]
+
+        heartbeat = asyncio.create_task(self._heartbeat(delivery_id, shard, delivered))
+        try:
+            result = await self.broadcaster.broadcast(
+                self.bots[tenant_name], recipients, text, on_delivered=delivered.add, kind="reminder_shard"
+            )
+        except asyncio.CancelledError:
+            # 종료로 중단되면 보낸 대상을 저장하고 임대를 풀어 다른 프로세스가 바로 이어받게 함
+            self.save_progress(delivery_id, shard, delivered, 0)
+            raise
+        finally:
+            heartbeat.cancel()
+
+        with self.conn:
+            self.conn.execute(
+                "UPDATE delivery_shards SET state = 'done', result = ?, delivered = '[]' WHERE delivery_id = ? AND shard = ?",
+                (json.dumps(result.to_dict()), delivery_id, shard),
+            )
+        logger.info("[샤드 %d/%d] %s - %s", shard, shards, delivery_id, result.summary())
+
+    async def work(self):
+        """발송 작업을 가져와 보내는 작업자 루프."""
+        while True:
+            try:
+                job = self.claim(time.time())
+                if job is None:
+                    await asyncio.sleep(CLUSTER_POLL_INTERVAL)
+                    continue
+                metrics.loop_iterations.inc("cluster_worker")
+                await self.deliver_shard(*job)
+            except Exception as e:
+                metrics.loop_errors.inc("cluster_worker")
+                logger.exception("샤드 발송 중 예외 발생: %s", e)
+                await asyncio.sleep(1)
+
+    async def run(self, owners):
+        """임대 갱신과 작업자 루프를 실행하고 종료 신호를 받으면 정리."""
+        stop = stop_event()
+        self.owners = {owner.name: owner for owner in owners}
+        for owner in owners:
+            bot = make_bot(owner.token)
+            await bot.initialize()
+            self.bots[owner.name] = bot
+
+        tasks = [asyncio.create_task(self.keep_leases()), asyncio.create_task(self.work())]
+        try:
+            await stop.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.leading:
+                await self.demote()
+            if self.shard is not None:
+                self.release(f"shard:{self.shard}")
+            self.release("leader")
+            for bot in self.bots.values():
+                await bot.shutdown()
+            self.broadcaster.close()
+            broadcaster.close()
+
+cluster = None  # 클러스터 모드에서 main이 설정
+
 async def start_scheduler(application: Application):
-    asyncio.create_task(notify_schedules(application))
-    asyncio.create_task(periodic_update_schedule())
+    """지표 서버와 알림·일정 정리 루프를 시작하고 루프 태스크 목록을 반환."""
+    if METRICS_PORT is not None:
+        await metrics.start_server(METRICS_HOST, METRICS_PORT)
+    return [asyncio.create_task(notify_schedules()), asyncio.create_task(expire_schedules())]
 
 async def shutdown(application: Application):
-    print("🔄 종료 처리 중...")
+    logger.info("종료 처리 중...")
+
+    for owner in tenants:
+        with use_tenant(owner):
+            # mute 상태 저장
+            save_mute_schedules(owner.mute_schedules)
 
-    # mute 상태 저장
-    save_mute_schedules(mute_schedules)
+            # 아직 저장되지 않은 구독자 변경 사항 저장
+            owner.subscribers.flush()
 
-    # 관리자 목록 저장
-    admins = load_admins()  # 현재 메모리에서 로드
-    save_admins(admins)  # JSON 파일에 저장
-    print("✅ 관리자 목록이 저장되었습니다.")
+    await metrics.stop_server()
+    broadcaster.close()
 
     # 모든 비동기 태스크 취소
     tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
     for task in tasks:
         task.cancel()
-    print("✅ 모든 태스크가 종료되었습니다.")
-
-
-def main():
-    application = Application.builder().token("TOKEN").build()     #TOKEN 지우고 토큰 번호 입력
-
-    # 기존 사용자 ID를 불러오기
-    application.bot_data["user_ids"] = load_user_ids()
+    # 취소된 태스크의 정리 코드(발송 진행 상황 저장 등)가 끝날 때까지 기다림
+    await asyncio.gather(*tasks, return_exceptions=True)
+    logger.info("모든 태스크가 종료되었습니다.")
+
+
+def build_application(owner):
+    """테넌트 하나의 텔레그램 Application을 만들고 핸들러를 등록."""
+    application = (
+        Application.builder()
+        .token(owner.token)
+        .base_url(BOT_API_URL)
+        .request(make_request(HTTP_POOL_SIZE))  # 핸들러 응답과 브로드캐스트 전송
+        .get_updates_request(make_request(1, "1.1"))  # long polling 전용 연결 하나
+        .concurrent_updates(PerChatUpdateProcessor(UPDATE_CONCURRENCY, owner))
+        .build()
+    )
+    owner.application = application
 
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
@@ -913,6 +3144,7 @@ def main():
     application.add_handler(CommandHandler("del", delete_schedule))         # 관리자 전용
     application.add_handler(CommandHandler("history", view_history))
     application.add_handler(CommandHandler("history365", view_history_365))
+    application.add_handler(CallbackQueryHandler(page_callback, pattern=r"^(list|hist|noop)"))  # 페이지 이동 버튼
     application.add_handler(CommandHandler("noti", notice))         # 관리자 전용
     application.add_handler(CommandHandler("delall", delall_confirm_prompt))         # 관리자 전용
     application.add_handler(CommandHandler("delhistory", delhistory_confirm_prompt))         # 관리자 전용
@@ -932,10 +3164,97 @@ def main():
     # 모든 텍스트 메시지 처리
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, fallback_handler))
 
+    # 지표 서버를 켠 경우 모든 핸들러의 처리 시간 기록
+    if METRICS_PORT is not None:
+        metrics.instrument(application)
+
+    return application
+
+def stop_event():
+    """SIGINT·SIGTERM을 받으면 set되는 Event."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            pass
+    return stop
+
+async def start_polling(application):
+    await application.initialize()
+    await application.updater.start_polling()
+    await application.start()
+
+async def stop_polling(application):
+    await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
+
+async def run_tenants(applications):
+    """여러 봇을 한 이벤트 루프에서 polling으로 실행 (알림 스케줄러와 전송기는 함께 사용)."""
+    stop = stop_event()
+    started = []
+    try:
+        for application in applications:
+            await start_polling(application)
+            started.append(application)
+        await start_scheduler(None)
+        await stop.wait()
+    finally:
+        for application in started:
+            await stop_polling(application)
+        await shutdown(None)
+
+def main():
+    global cluster
+    setup_logging()
+
+    # 기존 JSON 파일을 SQLite로 옮기는 일회성 명령: python main.py migrate
+    if sys.argv[1:] == ["migrate"]:
+        for config in load_tenant_configs():
+            migrate_json_to_sqlite(config["data_dir"])
+        return
+
+    if CLUSTER_DB:
+        # 클러스터 모드: 같은 설정으로 여러 프로세스를 띄우면 임대로 리더와 샤드 담당을 정함
+        if WEBHOOK_URL:
+            logger.warning("클러스터 모드에서는 웹훅을 지원하지 않아 리더가 polling으로 업데이트를 받습니다.")
+        cluster = Cluster(CLUSTER_DB, CLUSTER_SHARDS)
+        asyncio.run(cluster.run(load_tenants(load=False)))
+        return
+
+    tenants.extend(load_tenants())
+    logger.info("테넌트 %d개 로드: %s", len(tenants), ", ".join(owner.name for owner in tenants))
+
+    applications = [build_application(owner) for owner in tenants]
+
+    if len(applications) > 1:
+        # 여러 봇은 각자 getUpdates로 받음 (웹훅 서버는 봇 하나만 지원)
+        if WEBHOOK_URL:
+            logger.warning("테넌트가 여러 개이면 웹훅 모드를 지원하지 않아 polling으로 실행합니다.")
+        asyncio.run(run_tenants(applications))
+        return
+
+    application = applications[0]
     application.post_init = start_scheduler
+    application.post_shutdown = shutdown  # run_polling이 종료 신호를 직접 처리하므로 여기서 저장
 
     try:
-        application.run_polling()
+        if WEBHOOK_URL:
+            # 웹훅 모드: 텔레그램이 업데이트를 바로 보내므로 long polling 지연과 상시 getUpdates 연결이 없음
+            logger.info("웹훅 모드로 시작: %s:%d/%s -> %s", WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_URL)
+            application.run_webhook(
+                listen=WEBHOOK_LISTEN,
+                port=WEBHOOK_PORT,
+                url_path=WEBHOOK_PATH,
+                webhook_url=WEBHOOK_URL,
+                secret_token=WEBHOOK_SECRET,
+                max_connections=WEBHOOK_MAX_CONNECTIONS,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        else:
+            application.run_polling()
     except KeyboardInterrupt:
         asyncio.run(shutdown(application))
 
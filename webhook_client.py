@@ -0,0 +1,100 @@
+"""웹훅 모드 확인용 로컬 클라이언트.
+
+텔레그램 대신 가짜 업데이트(명령어 메시지)를 웹훅 서버에 POST로 보내고 응답 시간을 출력한다.
+봇은 WEBHOOK_URL 등을 지정해 웹훅 모드로 실행 중이어야 한다.
+
+    python webhook_client.py /list
+    python webhook_client.py --chat-id 123 --count 200 --concurrency 20 /history365
+    python webhook_client.py --url http://127.0.0.1:8443/telegram --secret 비밀값 "/noti 테스트"
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+update_ids = itertools.count(int(time.time()))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="웹훅 서버에 가짜 업데이트 전송")
+    parser.add_argument("text", help="보낼 메시지 (예: /list)")
+    parser.add_argument(
+        "--url",
+        default=f"http://{os.environ.get('WEBHOOK_LISTEN', '127.0.0.1')}:{os.environ.get('WEBHOOK_PORT', '8443')}"
+        f"/{os.environ.get('WEBHOOK_PATH', 'telegram')}",
+        help="웹훅 서버 주소 (기본값은 WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH 환경 변수로 구성)",
+    )
+    parser.add_argument("--secret", default=os.environ.get("WEBHOOK_SECRET"), help="X-Telegram-Bot-Api-Secret-Token 값")
+    parser.add_argument("--chat-id", type=int, default=1, help="보내는 사람 chat_id")
+    parser.add_argument("--count", type=int, default=1, help="보낼 업데이트 수")
+    parser.add_argument("--concurrency", type=int, default=1, help="동시에 보낼 요청 수")
+    parser.add_argument("--distinct-chats", action="store_true", help="업데이트마다 chat_id를 1씩 늘려 여러 사용자처럼 보냄")
+    return parser.parse_args()
+
+
+def make_update(chat_id, text):
+    """텔레그램 Bot API의 Update 형식으로 메시지 업데이트 생성."""
+    update_id = next(update_ids)
+    message = {
+        "message_id": update_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group", "first_name": "test"},
+        "from": {"id": abs(chat_id), "is_bot": False, "first_name": "test"},
+        "text": text,
+    }
+    if text.startswith("/"):
+        command = text.split()[0]
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+    return {"update_id": update_id, "message": message}
+
+
+def post_update(url, secret, update):
+    """업데이트 하나를 POST로 보내고 (HTTP 상태 코드, 응답 시간)을 반환."""
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers["X-Telegram-Bot-Api-Secret-Token"] = secret
+    request = urllib.request.Request(url, data=json.dumps(update).encode("utf-8"), headers=headers, method="POST")
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError) as e:
+        print(f"❌ 요청 실패: {e}")
+        status = None
+    return status, time.perf_counter() - started
+
+
+def main():
+    args = parse_args()
+    chat_ids = (args.chat_id + i if args.distinct_chats else args.chat_id for i in range(args.count))
+    updates = [make_update(chat_id, args.text) for chat_id in chat_ids]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+        results = list(pool.map(lambda update: post_update(args.url, args.secret, update), updates))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = sorted(latency for status, latency in results if status == 200)
+    print(f"전송 {len(results)}건, {elapsed:.2f}초, 상태 코드별 건수: {statuses}")
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"응답 시간(200) - 중앙값 {statistics.median(latencies) * 1000:.1f}ms, "
+            f"p95 {p95 * 1000:.1f}ms, 최대 {latencies[-1] * 1000:.1f}ms"
+        )
+    if statuses.get(403):
+        print("⚠️ 403 응답: --secret 값이 봇의 WEBHOOK_SECRET과 다릅니다.")
+
+
+if __name__ == "__main__":
+    main()